@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Envio de alertas do Monitorador de Servidores GlassFish
+Fila em segundo plano com conexão SMTP reaproveitada, resumo e novas tentativas
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class Alert:
+    """Um alerta aguardando envio"""
+
+    __slots__ = ('subject', 'message', 'created')
+
+    def __init__(self, subject, message):
+        self.subject = subject
+        self.message = message
+        self.created = time.time()
+
+
+class AlertDispatcher:
+    """Envia os alertas por email fora das threads de verificação
+
+    - os alertas que chegam dentro de `alert_digest_window` segundos do
+      primeiro viram um único email (uma queda de 50 servidores = 1 resumo);
+    - a conexão SMTP (STARTTLS + login) é mantida e reaproveitada, sendo
+      fechada após `smtp_idle_timeout` segundos sem alertas;
+    - cada email é enviado uma única vez para todos os destinatários;
+    - falhas são repetidas até `alert_retry_attempts` vezes, com espera
+      dobrando a partir de `alert_retry_backoff` segundos.
+
+    Lê CONFIG a cada envio: mudanças feitas pela interface valem na hora.
+    Com `forward`, os alertas são repassados a essa função em vez de
+    enviados (workers do daemon: um só resumo no processo principal).
+    """
+
+    def __init__(self, config, logger, forward=None):
+        self.config = config
+        self.logger = logger
+        self.forward = forward
+        self.sent = 0
+        self.failed = 0
+        self._queue = deque()
+        self._smtp = None
+        self._stopping = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def enabled(self):
+        return bool(self.config['email_alerts'] and self.config['email_user'])
+
+    def put(self, subject, message):
+        """Enfileira um alerta; retorna na hora"""
+        if self.forward is not None:
+            self.forward(subject, message)
+            return
+        if not self.enabled():
+            return
+        with self._cond:
+            if self._closed:
+                return  # Verificação que terminou depois de stop(): não reabre o envio
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+                self._thread.start()
+            self._queue.append(Alert(subject, message))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            self._serve()
+            self._close()
+            with self._cond:
+                # Reaberto por start() enquanto fechava: continuar com os novos alertas
+                if self._stopping or not self._queue:
+                    self._thread = None
+                    return
+
+    def _serve(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopping,
+                                    timeout=self.config['smtp_idle_timeout'])
+                if not self._queue and self._stopping:
+                    return
+                idle = not self._queue
+            if idle:
+                self._close()  # Sem alertas há algum tempo: liberar a conexão
+                continue
+            with self._cond:
+                # Juntar os alertas que chegarem durante a janela do resumo
+                deadline = self._queue[0].created + self.config['alert_digest_window']
+                self._cond.wait_for(lambda: self._stopping, timeout=max(0, deadline - time.time()))
+                batch = list(self._queue)
+                self._queue.clear()
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        """Envia um lote, repetindo com espera exponencial em caso de falha"""
+        attempts = max(1, int(self.config['alert_retry_attempts']))
+        attempt = 0
+        while True:
+            try:
+                self._send(self.build_message(batch))
+                self.sent += 1
+                self.logger.info(f"Email de alerta enviado: {self.subject_for(batch)}")
+                return
+            except Exception as e:
+                self._close()
+                attempt += 1
+                if attempt >= attempts:
+                    self.failed += len(batch)
+                    self.logger.error(f"Erro ao enviar email ({len(batch)} alertas descartados): {e}")
+                    return
+                delay = min(self.config['alert_retry_backoff'] * 2 ** (attempt - 1), 300)
+                self.logger.warning(f"Erro ao enviar email (tentativa {attempt}/{attempts}, "
+                                    f"nova tentativa em {delay}s): {e}")
+            with self._cond:
+                if self._cond.wait_for(lambda: self._stopping, timeout=delay):
+                    attempt = attempts - 1  # Parando: só mais uma tentativa
+                # Alertas que chegaram durante a espera entram no mesmo email
+                batch += self._queue
+                self._queue.clear()
+
+    def subject_for(self, batch):
+        if len(batch) == 1:
+            return batch[0].subject
+        return f"Resumo: {len(batch)} alertas de servidores"
+
+    def build_message(self, batch):
+        """Email único com um alerta ou o resumo de vários"""
+        # Módulos de email só são carregados quando há alerta a enviar
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        if len(batch) == 1:
+            body = batch[0].message
+        else:
+            body = '\n\n'.join(
+                f"[{datetime.fromtimestamp(alert.created).strftime('%Y-%m-%d %H:%M:%S')}] "
+                f"{alert.subject}\n{alert.message}" for alert in batch)
+        msg = MIMEMultipart()
+        msg['From'] = self.config['email_user']
+        msg['To'] = ', '.join(self.config['alert_recipients'])
+        msg['Subject'] = self.subject_for(batch)
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        return msg
+
+    def _connection(self):
+        """Conexão SMTP autenticada, reaproveitada enquanto responder"""
+        import smtplib
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close()
+        smtp = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'],
+                            timeout=self.config['smtp_timeout'])
+        try:
+            smtp.starttls()
+            smtp.login(self.config['email_user'], self.config['email_password'])
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        return smtp
+
+    def _send(self, msg):
+        # Um único envio para todos os destinatários
+        self._connection().sendmail(self.config['email_user'], list(self.config['alert_recipients']),
+                                    msg.as_string())
+
+    def _close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def start(self):
+        """Volta a aceitar alertas depois de stop()"""
+        with self._cond:
+            self._closed = False
+            self._stopping = False
+            self._cond.notify_all()
+
+    def stop(self, timeout=30):
+        """Para de aceitar alertas e encerra a thread de envio
+
+        Os pendentes são enviados (uma última tentativa) em segundo plano;
+        espera no máximo `timeout` segundos (0 = não espera).
+        """
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout=timeout)
+        if timeout and thread.is_alive():
+            self.logger.warning("Alertas: envio pendente continua em segundo plano")
+
+
+# Status que contam como "fora do ar" para os alertas
+DOWN_STATUSES = ('OFFLINE', 'PORTAS_FECHADAS', 'ERRO_HTTP')
+
+
+class ServerAlertState:
+    """Estado de alerta de um servidor: poucos inteiros, O(1) por servidor"""
+
+    __slots__ = ('confirmed', 'alerted', 'window', 'filled', 'last', 'changes', 'flapping', 'last_alert')
+
+    def __init__(self, down):
+        self.confirmed = down  # Estado confirmado (1 = fora do ar)
+        self.alerted = down  # Último estado avisado
+        self.window = 0  # Últimas observações, 1 bit cada (1 = fora do ar)
+        self.filled = 0
+        self.last = down  # Última observação
+        self.changes = 0  # Últimas observações, 1 bit = houve mudança
+        self.flapping = False
+        self.last_alert = None
+
+
+class AlertStateMachine:
+    """Decide quando uma mudança de status vira alerta
+
+    - confirmação N de M: a mudança só vale com `alert_confirm_count`
+      observações no novo estado entre as últimas `alert_confirm_window`;
+    - oscilação: com `flap_start_changes` mudanças nas últimas `flap_window`
+      observações o servidor é marcado como instável (um único alerta) e os
+      alertas de queda/recuperação ficam suspensos até as mudanças caírem
+      para `flap_stop_changes` (histerese);
+    - supressão: no mínimo `alert_min_interval` segundos entre alertas do
+      mesmo servidor; o alerta retido sai na primeira verificação após o prazo.
+
+    observe() devolve a lista de eventos: 'DOWN', 'UP', 'FLAPPING', 'STABLE'.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, status, now=None, previous_status=None):
+        """Registra uma verificação; `previous_status` serve de ponto de partida para servidores novos"""
+        now = time.time() if now is None else now
+        config = self.config
+        down = 1 if status in DOWN_STATUSES else 0
+        confirm_window = max(1, int(config['alert_confirm_window']))
+        confirm_count = min(max(1, int(config['alert_confirm_count'])), confirm_window)
+        flap_window = max(1, int(config['flap_window']))
+        events = []
+
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                # Primeira verificação: estado de partida, sem alerta (como antes)
+                baseline = previous_status or status
+                state = self._states[name] = ServerAlertState(1 if baseline in DOWN_STATUSES else 0)
+
+            state.window = ((state.window << 1) | down) & ((1 << confirm_window) - 1)
+            state.filled = min(state.filled + 1, confirm_window)
+            downs = bin(state.window).count('1')
+            ups = state.filled - downs
+            if not state.confirmed and downs >= confirm_count:
+                state.confirmed = 1
+            elif state.confirmed and ups >= confirm_count:
+                state.confirmed = 0
+
+            state.changes = ((state.changes << 1) | (down != state.last)) & ((1 << flap_window) - 1)
+            state.last = down
+            changes = bin(state.changes).count('1')
+
+            if config['flap_start_changes'] and not state.flapping and changes >= config['flap_start_changes']:
+                state.flapping = True
+                state.last_alert = now
+                events.append('FLAPPING')
+            elif state.flapping and changes <= config['flap_stop_changes']:
+                # Estabilizou: o alerta de estável já informa o status atual
+                state.flapping = False
+                state.alerted = state.confirmed
+                state.last_alert = now
+                events.append('STABLE')
+
+            if (not state.flapping and state.confirmed != state.alerted
+                    and (state.last_alert is None or now - state.last_alert >= config['alert_min_interval'])):
+                state.alerted = state.confirmed
+                state.last_alert = now
+                events.append('DOWN' if state.confirmed else 'UP')
+        return events
+
+    def retain(self, names):
+        """Descarta o estado de servidores que não estão mais em `names`"""
+        names = set(names)
+        with self._lock:
+            for name in [name for name in self._states if name not in names]:
+                del self._states[name]
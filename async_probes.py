@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend de verificação assíncrono do Monitorador de Servidores GlassFish
+Ping (ICMP nativo), portas TCP e HTTP num único event loop, sem fork/exec
+"""
+
+import asyncio
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+from monitor import build_ping_command, parse_ping_time, skipped_port_result, deadline_exceeded_result, dns_failure_checks
+from results import CheckResult
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+def icmp_checksum(data):
+    """Calcula o checksum de internet (RFC 1071) de um pacote ICMP"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident, seq):
+    """Monta um pacote ICMP echo request"""
+    payload = b'glassfish-monitor'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + payload
+
+
+class AsyncProbeBackend:
+    """Backend async: todas as verificações rodam num event loop em thread própria"""
+
+    def __init__(self, monitor, config):
+        self.monitor = monitor
+        self.config = config
+        self.logger = monitor.logger
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-probes', daemon=True)
+        self._thread.start()
+        self._icmp_socket_type = None  # SOCK_DGRAM (sem privilégio) ou SOCK_RAW; False = indisponível
+        self._icmp_seq = 0
+        self._icmp_ident = os.getpid() & 0xFFFF
+
+    def _open_icmp_socket(self):
+        """Abre um socket ICMP, preferindo o modo sem privilégios (Linux/macOS)"""
+        if self._icmp_socket_type is None:
+            for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+                try:
+                    sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+                except OSError:
+                    continue
+                self._icmp_socket_type = sock_type
+                return sock
+            self._icmp_socket_type = False
+            self.logger.warning("ICMP nativo indisponível (sem permissão); usando o comando ping")
+            return None
+        if self._icmp_socket_type is False:
+            return None
+        return socket.socket(socket.AF_INET, self._icmp_socket_type, socket.IPPROTO_ICMP)
+
+    async def _icmp_echo(self, sock, address, timeout):
+        """Envia um echo request e aguarda a resposta correspondente; retorna o tempo em ms"""
+        self._icmp_seq = (self._icmp_seq + 1) & 0xFFFF
+        seq = self._icmp_seq
+        raw = sock.type == socket.SOCK_RAW
+        reply = self.loop.create_future()
+
+        def on_readable():
+            try:
+                data = sock.recv(2048)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if not reply.done():
+                    reply.set_exception(e)
+                return
+            if raw:
+                data = data[(data[0] & 0x0F) * 4:]  # Remover cabeçalho IP
+            if len(data) < 8:
+                return
+            icmp_type, _, _, ident, reply_seq = struct.unpack('!BBHHH', data[:8])
+            # Sockets DGRAM têm o identificador reescrito pelo kernel
+            if icmp_type == ICMP_ECHO_REPLY and reply_seq == seq and (not raw or ident == self._icmp_ident):
+                if not reply.done():
+                    reply.set_result(None)
+
+        sock.setblocking(False)
+        self.loop.add_reader(sock.fileno(), on_readable)  # NotImplementedError no ProactorEventLoop (Windows)
+        try:
+            start_time = self.loop.time()
+            sock.sendto(build_echo_request(self._icmp_ident, seq), (address, 0))
+            await asyncio.wait_for(reply, timeout)
+            return (self.loop.time() - start_time) * 1000
+        finally:
+            self.loop.remove_reader(sock.fileno())
+
+    async def _subprocess_ping(self, host):
+        """Ping via comando externo, sem bloquear o event loop"""
+        start_time = self.loop.time()
+        process = await asyncio.create_subprocess_exec(
+            *build_ping_command(host, self.config['ping_timeout']),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), self.config['ping_timeout'] + 2)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        response_time = (self.loop.time() - start_time) * 1000
+        if process.returncode != 0:
+            return None
+        return parse_ping_time(stdout.decode(errors='replace'), response_time)
+
+    async def check_ping(self, host):
+        """Verifica se o host responde ao ping e retorna tempo de resposta"""
+        try:
+            sock = self._open_icmp_socket() if self.config['icmp_ping'] else None
+            if sock is not None:
+                with sock:
+                    infos = await self.loop.getaddrinfo(host, None, family=socket.AF_INET)
+                    try:
+                        response_time = await self._icmp_echo(sock, infos[0][4][0], self.config['ping_timeout'])
+                    except asyncio.TimeoutError:
+                        response_time = None
+                    except NotImplementedError:
+                        # Event loop sem add_reader (Proactor do Windows): ICMP nativo não serve aqui
+                        if self._icmp_socket_type is not False:
+                            self._icmp_socket_type = False
+                            self.logger.warning("ICMP nativo indisponível neste event loop; usando o comando ping")
+                        sock = None
+            if sock is None:
+                response_time = await self._subprocess_ping(host)
+
+            if response_time is not None:
+                return CheckResult(success=True, response_time=round(response_time, 1))
+            return CheckResult(success=False, response_time=0, error='Sem resposta')
+        except Exception as e:
+            self.logger.error(f"Erro no ping para {host}: {e or type(e).__name__}")
+            return CheckResult(success=False, response_time=0, error=str(e) or type(e).__name__)
+
+    async def check_port(self, host, port):
+        """Verifica se uma porta específica está aberta e retorna detalhes"""
+        try:
+            start_time = self.loop.time()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.config['port_timeout'])
+            except asyncio.TimeoutError:
+                return CheckResult(success=False, port=port, response_time=0, status='FECHADA',
+                                   error='Falha na conexão (timeout)')
+            except OSError as e:
+                # Recusada, host/rede inalcançável...: porta fechada, como o connect_ex do backend legacy
+                return CheckResult(success=False, port=port, response_time=0, status='FECHADA',
+                                   error=f'Falha na conexão (código: {e.errno})')
+            response_time = (self.loop.time() - start_time) * 1000  # em ms
+            writer.close()
+
+            return CheckResult(success=True, port=port, response_time=round(response_time, 1), status='ABERTA')
+        except Exception as e:
+            self.logger.error(f"Erro ao verificar porta {port} em {host}: {e}")
+            return CheckResult(success=False, port=port, response_time=0, status='ERRO', error=str(e))
+
+    async def _http_get(self, url, address=None):
+        """Requisição HTTP/1.1 mínima; retorna (status_code, segundos até o cabeçalho de resposta)
+
+        Com `address` a conexão vai direto ao endereço resolvido; Host e SNI
+        continuam com o nome da URL. Uma conexão por verificação (sem
+        keep-alive) e só a linha de status é lida: http_pool_*,
+        http_max_bytes e 'CONDITIONAL' valem apenas para o backend legacy.
+        """
+        parts = urlsplit(url)
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        start_time = self.loop.time()
+        reader, writer = await asyncio.open_connection(
+            address or parts.hostname, port, ssl=ssl.create_default_context() if https else None,
+            server_hostname=parts.hostname if https else None)
+        try:
+            # O backend async lê apenas a linha de status; HEAD evita que o servidor gere o corpo
+            method = 'HEAD' if self.config['http_method'].upper() == 'HEAD' else 'GET'
+            writer.write((f"{method} {path} HTTP/1.1\r\n"
+                          f"Host: {parts.netloc}\r\n"
+                          "User-Agent: glassfish-monitor\r\n"
+                          "Accept: */*\r\n"
+                          "Connection: close\r\n\r\n").encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            elapsed = self.loop.time() - start_time
+            fields = status_line.split()
+            if len(fields) < 2 or not fields[0].startswith(b'HTTP/'):
+                raise ValueError(f"Resposta HTTP inválida: {status_line[:60]!r}")
+            return int(fields[1]), elapsed
+        finally:
+            writer.close()
+
+    async def check_http(self, url, address=None):
+        """Verifica resposta HTTP de uma URL (conectando em `address`, se já resolvido)"""
+        try:
+            status_code, elapsed = await asyncio.wait_for(self._http_get(url, address), self.config['http_timeout'])
+            return CheckResult(success=200 <= status_code < 400, status_code=status_code, response_time=elapsed)
+        except asyncio.TimeoutError:
+            return CheckResult(success=False, status_code=0, response_time=self.config['http_timeout'],
+                               error='Timeout')
+        except OSError:
+            return CheckResult(success=False, status_code=0, response_time=0, error='Erro de Conexão')
+        except Exception as e:
+            return CheckResult(success=False, status_code=0, response_time=0, error=str(e))
+
+    async def run_checks(self, server, address=None):
+        """Executa as verificações de um servidor, em paralelo e com prazo total
+
+        Mesmas regras de ServerMonitor.run_checks (parallel_ping,
+        gate_http_on_app_port, check_deadline); aqui cada verificação é uma task.
+        """
+        if not self.config['parallel_checks']:
+            return await self.run_checks_sequential(server, address)
+
+        host = address or server['host']
+        health_url = server.get('health_url')
+        deadline = self.loop.time() + self.config['check_deadline'] if self.config['check_deadline'] else None
+
+        async def wait(task, check, port=None):
+            timeout = None if deadline is None else max(0, deadline - self.loop.time())
+            try:
+                return await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                return deadline_exceeded_result(check, port)
+
+        ping_task = self.loop.create_task(self.check_ping(host))
+        if not self.config['parallel_ping']:
+            ping_result = await wait(ping_task, 'ping')
+            if not ping_result.success:
+                return ping_result, skipped_port_result(server['app_port']), skipped_port_result(server['admin_port']), None
+
+        app_port_task = self.loop.create_task(self.check_port(host, server['app_port']))
+        admin_port_task = self.loop.create_task(self.check_port(host, server['admin_port']))
+        http_task = None
+        if health_url and not self.config['gate_http_on_app_port']:
+            http_task = self.loop.create_task(self.check_http(health_url, address))
+
+        if self.config['parallel_ping']:
+            ping_result = await wait(ping_task, 'ping')
+        app_port_result = await wait(app_port_task, 'port', server['app_port'])
+        if http_task is None and health_url and ping_result.success and app_port_result.success:
+            http_task = self.loop.create_task(self.check_http(health_url, address))
+        admin_port_result = await wait(admin_port_task, 'port', server['admin_port'])
+        http_result = await wait(http_task, 'http') if http_task else None
+
+        return ping_result, app_port_result, admin_port_result, http_result
+
+    async def run_checks_sequential(self, server, address=None):
+        """Executa as verificações de ping, portas e HTTP uma após a outra"""
+        host = address or server['host']
+
+        ping_result = await self.check_ping(host)
+        if ping_result.success:
+            app_port_result = await self.check_port(host, server['app_port'])
+            admin_port_result = await self.check_port(host, server['admin_port'])
+        else:
+            app_port_result = skipped_port_result(server['app_port'])
+            admin_port_result = skipped_port_result(server['admin_port'])
+
+        http_result = None
+        if ping_result.success and app_port_result.success and 'health_url' in server:
+            http_result = await self.check_http(server['health_url'], address)
+
+        return ping_result, app_port_result, admin_port_result, http_result
+
+    async def monitor_server(self, server, semaphore):
+        """Monitora um servidor respeitando o limite de verificações simultâneas"""
+        async with semaphore:
+            if not self.monitor.monitoring:
+                return None
+            timestamp = time.time()
+            dns_result = self.monitor.dns.lookup(server['host'], server.get('ip'))
+            if dns_result is None:
+                # Nome fora do cache: getaddrinfo bloqueia, resolver numa thread
+                dns_result = await self.loop.run_in_executor(None, self.monitor.resolve_server, server)
+            if dns_result.success:
+                checks = await self.run_checks(server, dns_result.address)
+            else:
+                checks = dns_failure_checks(server, dns_result)
+        # Log, CSV e alertas fazem I/O bloqueante: executar fora do event loop
+        return await self.loop.run_in_executor(None, self.monitor.process_result, server, timestamp, *checks, dns_result)
+
+    async def _probe(self, server):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, int(self.config['max_concurrent_probes'])))
+        return await self.monitor_server(server, self._semaphore)
+
+    def submit(self, server):
+        """Agenda a verificação de um servidor; retorna um concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self._probe(server), self.loop)
+
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.loop.shutdown_default_executor()
+
+    def close(self):
+        """Cancela verificações pendentes e encerra o event loop"""
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=10)
+        except Exception as e:
+            self.logger.error(f"Erro ao encerrar o backend async: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if not self.loop.is_running():
+            self.loop.close()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frota de servidores GlassFish falsos para os benchmarks
+Centenas a milhares de endpoints em loopback, servidos por um único event loop
+em um processo separado (o custo da frota não entra nas medidas do monitor)
+"""
+
+import asyncio
+import multiprocessing
+import random
+import socket
+
+# Tipos de servidor falso e proporção padrão na frota
+DEFAULT_MIX = {
+    'ok': 0.80,         # Portas abertas, HTTP 200 com latência normal
+    'slow': 0.05,       # HTTP 200 com latência alta
+    'error': 0.05,      # HTTP 500
+    'hang': 0.04,       # Aceita a conexão HTTP e nunca responde (timeout)
+    'closed': 0.04,     # Nada escutando: conexão recusada
+    'blackhole': 0.02,  # Endereço sem rota (TEST-NET-1): conexões sem resposta
+}
+
+BLACKHOLE_HOST = '192.0.2.1'
+
+
+def parse_mix(text):
+    """Converte 'ok=0.8,hang=0.2' em dicionário de proporções"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, share = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Tipo de servidor desconhecido: {kind}")
+        mix[kind] = float(share)
+    return mix
+
+
+def assign_kinds(count, mix, seed=0):
+    """Lista de `count` tipos nas proporções de `mix` (ordem embaralhada e reprodutível)"""
+    total = sum(mix.values())
+    kinds = []
+    for kind, share in mix.items():
+        kinds += [kind] * int(round(count * share / total))
+    kinds = (kinds + ['ok'] * count)[:count]
+    random.Random(seed).shuffle(kinds)
+    return kinds
+
+
+def free_port():
+    """Porta livre em loopback, sem nada escutando (para os servidores 'closed')"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def raise_fd_limit():
+    """Sobe o limite de arquivos abertos até o máximo permitido (Unix)"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def handle_http(reader, writer, kind, latency, body):
+    """Porta da aplicação: HTTP/1.1 com keep-alive e o comportamento do tipo"""
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            if kind == 'hang':
+                await asyncio.Event().wait()
+            if latency:
+                await asyncio.sleep(latency)
+            status = b'500 Internal Server Error' if kind == 'error' else b'200 OK'
+            payload = b'' if head.startswith(b'HEAD ') else body
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: text/html\r\nContent-Length: '
+                         + str(len(body)).encode() + b'\r\n\r\n' + payload)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def handle_admin(reader, writer):
+    """Porta de administração: aceita e fecha"""
+    writer.close()
+
+
+async def serve_fleet(conn, kinds, latency, slow_latency, body_size):
+    body = b'<html>' + b'x' * max(0, body_size - 13) + b'</html>'
+    listeners = []
+    servers = []
+    connections = set()  # Tasks das conexões abertas: referência forte e cancelamento na parada
+
+    async def tracked(handler, reader, writer):
+        task = asyncio.current_task()
+        connections.add(task)
+        try:
+            await handler(reader, writer)
+        finally:
+            connections.discard(task)
+
+    for index, kind in enumerate(kinds):
+        name = f'fake-{index:05d}-{kind}'
+        if kind == 'blackhole':
+            host, app_port, admin_port = BLACKHOLE_HOST, 8080, 4848
+        elif kind == 'closed':
+            host, app_port, admin_port = '127.0.0.1', free_port(), free_port()
+        else:
+            delay = slow_latency if kind == 'slow' else latency
+            app = await asyncio.start_server(
+                lambda r, w, kind=kind, delay=delay: tracked(
+                    lambda r, w: handle_http(r, w, kind, delay, body), r, w), '127.0.0.1', 0)
+            admin = await asyncio.start_server(lambda r, w: tracked(handle_admin, r, w), '127.0.0.1', 0)
+            listeners += [app, admin]
+            host = '127.0.0.1'
+            app_port = app.sockets[0].getsockname()[1]
+            admin_port = admin.sockets[0].getsockname()[1]
+        servers.append({
+            'name': name,
+            'host': host,
+            'app_port': app_port,
+            'admin_port': admin_port,
+            'health_url': f'http://{host}:{app_port}/sfcs/faces/login.jsf',
+            'kind': kind,
+        })
+    conn.send(servers)
+    # Espera o pedido de parada sem bloquear o event loop
+    await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+    for listener in listeners:
+        listener.close()
+    # Conexões presas (tipo 'hang') são canceladas e aguardadas antes de fechar o loop
+    for task in connections:
+        task.cancel()
+    await asyncio.gather(*connections, return_exceptions=True)
+
+
+def run_fleet(conn, kinds, latency, slow_latency, body_size):
+    """Processo da frota"""
+    raise_fd_limit()
+    asyncio.run(serve_fleet(conn, kinds, latency, slow_latency, body_size))
+
+
+class FakeFleet:
+    """Frota de servidores falsos em loopback para medir o ServerMonitor
+
+    with FakeFleet(servers=500) as fleet:
+        monitor.servers = fleet.servers
+    """
+
+    def __init__(self, servers=100, mix=None, latency=0.02, slow_latency=1.0, body_size=20000, seed=0):
+        self.kinds = assign_kinds(servers, mix or DEFAULT_MIX, seed)
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.body_size = body_size
+        self.servers = []
+        self._conn = None
+        self._process = None
+
+    def start(self):
+        """Sobe a frota e retorna a lista de servidores no formato de servers_config.json"""
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=run_fleet,
+            args=(child_conn, self.kinds, self.latency, self.slow_latency, self.body_size),
+            name='fake-fleet', daemon=True)
+        self._process.start()
+        self.servers = self._conn.recv()
+        return self.servers
+
+    def stop(self):
+        """Derruba a frota"""
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
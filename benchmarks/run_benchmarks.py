@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks do Monitorador de Servidores GlassFish
+Mede monitor_loop (por backend), check_port, check_http e a gravação do histórico
+contra uma frota falsa em loopback, além do tempo de inicialização do console, do
+daemon e da interface e do custo dos registros de resultado, e salva os resultados
+em benchmarks/results/
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_fleet import DEFAULT_MIX, FakeFleet, parse_mix, raise_fd_limit  # noqa: E402
+from monitor import CONFIG, ServerMonitor  # noqa: E402
+from history import CsvHistorySink, HistoryWriter, SqliteHistoryStore  # noqa: E402
+from results import CheckResult, ProbeResult, Status  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Inicializações medidas em processos novos: código executado no processo filho
+STARTUP_SCENARIOS = {
+    'console': "import monitor; monitor.ServerMonitor().history.stop()",
+    'daemon': "import monitor_daemon; monitor_daemon.MonitorDaemon([], workers=1).monitor.history.stop()",
+    # Até a tabela de servidores aparecer na janela
+    'gui': ("import tkinter as tk; root = tk.Tk(); import gui_monitor; "
+            "app = gui_monitor.ServerMonitorGUI(root); root.update(); app.on_closing()"),
+}
+# Sem display (Tk indisponível) mede-se só a importação da interface
+GUI_IMPORT_SCENARIO = "import gui_monitor"
+
+
+def rss_mb():
+    """Memória residente do processo em MB (None se indisponível)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class Measure:
+    """Tempo de parede, CPU (todas as threads do processo) e memória de um trecho"""
+
+    def __enter__(self):
+        self.rss_before = rss_mb()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.wall = time.perf_counter() - self.wall_start
+        self.cpu = time.process_time() - self.cpu_start
+        self.rss_after = rss_mb()
+
+    def report(self, operations):
+        return {
+            'operations': operations,
+            'wall_seconds': round(self.wall, 4),
+            'ops_per_second': round(operations / self.wall, 2) if self.wall else None,
+            'cpu_seconds': round(self.cpu, 4),
+            'cpu_percent': round(self.cpu / self.wall * 100, 1) if self.wall else None,
+            'rss_mb': round(self.rss_after, 1) if self.rss_after is not None else None,
+            'rss_delta_mb': (round(self.rss_after - self.rss_before, 1)
+                             if self.rss_after is not None and self.rss_before is not None else None),
+        }
+
+
+def quiet_console(logger):
+    """Resultados continuam no monitor.log, mas não no console do benchmark"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setLevel(logging.WARNING)
+
+
+def instant_ping(host):
+    return CheckResult(success=True, response_time=0.1)
+
+
+async def instant_async_ping(self, host):
+    return instant_ping(host)
+
+
+def bench_monitor_loop(servers, backend, args):
+    """Primeiro ciclo completo do monitor_loop: todos os servidores verificados uma vez"""
+    CONFIG.update(probe_backend=backend, monitor_interval=3600, schedule_jitter=0)
+    monitor = ServerMonitor()
+    quiet_console(monitor.logger)
+    restore = None
+    if args.ping == 'skip':
+        if backend == 'async':
+            from async_probes import AsyncProbeBackend
+            restore = AsyncProbeBackend.check_ping
+            AsyncProbeBackend.check_ping = instant_async_ping
+        else:
+            monitor.check_ping = instant_ping
+
+    seen = set()
+    statuses = {}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_result(result):
+        with lock:
+            seen.add(result['name'])
+            status = str(result['status'])
+            statuses[status] = statuses.get(status, 0) + 1
+            if len(seen) >= len(servers):
+                done.set()
+
+    monitor.add_listener(on_result)
+    monitor.servers = servers
+    try:
+        with Measure() as measure:
+            monitor.start_monitoring()
+            completed = done.wait(args.sweep_timeout)
+        report = measure.report(len(seen))
+        report['completed'] = completed
+        report['statuses'] = statuses
+        report['diagnostics'] = {key: monitor.get_diagnostics()[key]
+                                 for key in ('scheduler_lag_seconds', 'probe_seconds', 'max_in_flight')}
+    finally:
+        monitor.stop_monitoring()
+        if restore is not None:
+            from async_probes import AsyncProbeBackend
+            AsyncProbeBackend.check_ping = restore
+    return report
+
+
+def bench_pool(function, arguments, workers):
+    """Executa `function` sobre `arguments` num pool do tamanho de max_concurrent_probes"""
+    with Measure() as measure:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(function, arguments))
+    report = measure.report(len(arguments))
+    report['success'] = sum(1 for result in results if result.get('success'))
+    return report
+
+
+def bench_check_port(servers, args):
+    monitor = ServerMonitor()
+    quiet_console(monitor.logger)
+    targets = [(server['host'], port) for server in servers for port in (server['app_port'], server['admin_port'])]
+    try:
+        return bench_pool(lambda target: monitor.check_port(*target), targets, CONFIG['max_concurrent_probes'])
+    finally:
+        monitor.stop_monitoring()
+
+
+def bench_check_http(servers, args):
+    monitor = ServerMonitor()
+    quiet_console(monitor.logger)
+    urls = [server['health_url'] for server in servers] * args.http_rounds
+    try:
+        return bench_pool(monitor.check_http, urls, CONFIG['max_concurrent_probes'])
+    finally:
+        monitor.stop_monitoring()
+
+
+def legacy_sample_result(index):
+    """O mesmo resultado de sample_result nos dicionários aninhados de antes (comparação de memória)"""
+    return {
+        'timestamp': datetime.now(),
+        'name': f'fake-{index % 1000:05d}',
+        'host': '127.0.0.1',
+        'ping': {'success': True, 'response_time': 1.2},
+        'app_port': {'success': True, 'port': 8080, 'response_time': 0.4, 'status': 'ABERTA'},
+        'admin_port': {'success': False, 'port': 4848, 'response_time': 0, 'status': 'FECHADA'},
+        'http': {'status_code': 200, 'success': True, 'response_time': 0.035},
+        'status': 'ONLINE',
+        'status_icon': '✅',
+    }
+
+
+def sample_result(index):
+    """Resultado sintético como o produzido por ServerMonitor.process_result"""
+    return ProbeResult(
+        time.time(), f'fake-{index % 1000:05d}', '127.0.0.1',
+        CheckResult(success=True, response_time=1.2),
+        CheckResult(success=True, port=8080, response_time=0.4, status='ABERTA'),
+        CheckResult(success=False, port=4848, response_time=0, status='FECHADA'),
+        CheckResult(success=True, status_code=200, response_time=0.035),
+        Status.ONLINE)
+
+
+def bench_results(args):
+    """Resultados guardados em memória: dicionários aninhados (formato antigo) x registros com __slots__
+
+    Mede a criação de N resultados, a memória ocupada por eles, o tempo de
+    uma coleta completa do GC com eles vivos e a leitura de campos (por
+    atributo nos registros e pelo adaptador de dicionário).
+    """
+    count = args.result_records
+    readers = {
+        'dict': lambda result: result['http']['response_time'] + result['ping']['response_time'],
+        'record': lambda result: result.http.response_time + result.ping.response_time,
+        'record_adapter': lambda result: result['http']['response_time'] + result['ping']['response_time'],
+    }
+    reports = {}
+    for name, build in (('dict', legacy_sample_result), ('record', sample_result)):
+        gc.collect()
+        with Measure() as measure:
+            results = [build(index) for index in range(count)]
+        report = measure.report(count)
+
+        start = time.perf_counter()
+        gc.collect()
+        report['gc_collect_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        for reader_name in [reader for reader in readers if reader.startswith(name)]:
+            read = readers[reader_name]
+            start = time.perf_counter()
+            for result in results:
+                read(result)
+            report[f'{reader_name}_reads_per_second'] = round(count / (time.perf_counter() - start), 1)
+        del results
+
+        gc.collect()
+        tracemalloc.start()
+        results = [build(index) for index in range(count)]
+        report['bytes_per_result'] = round(tracemalloc.get_traced_memory()[0] / count)
+        tracemalloc.stop()
+        del results
+        reports[f'results[{name}]'] = report
+        print(f"  results[{name}]: {report['bytes_per_result']} bytes/resultado, "
+              f"GC {report['gc_collect_ms']} ms")
+    return reports
+
+
+def bench_history(args):
+    """Gravação em lote no SQLite e no CSV: enfileirar N resultados e esvaziar a fila"""
+    logger = logging.getLogger('benchmark')
+    results = [sample_result(index) for index in range(args.history_records)]
+    sinks = [SqliteHistoryStore('bench_history.db'), CsvHistorySink('bench_history.csv')]
+    writer = HistoryWriter(sinks, logger, max_queue=CONFIG['history_queue_size'],
+                           batch_size=CONFIG['history_batch_size'],
+                           flush_interval=CONFIG['history_flush_interval'],
+                           overflow_policy='block', maintenance_interval=3600)
+    with Measure() as measure:
+        for result in results:
+            writer.put(result)
+        writer.stop(timeout=600)
+    report = measure.report(len(results))
+    report['dropped'] = writer.dropped
+    return report
+
+
+def run_startup(code, runs):
+    """Executa `code` em `runs` processos Python novos; retorna as durações (s) ou None se falhar"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(BENCH_DIR),
+                                                                    os.environ.get('PYTHONPATH')])))
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, timeout=120)
+        if completed.returncode != 0:
+            return None
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_startup(args):
+    """Tempo até o monitor estar pronto, do início do interpretador (inclui importações)"""
+    reports = {}
+    for name, code in STARTUP_SCENARIOS.items():
+        times_before = os.times()
+        durations = run_startup(code, args.startup_runs)
+        if durations is None and name == 'gui':
+            name, durations = 'gui_import', run_startup(GUI_IMPORT_SCENARIO, args.startup_runs)
+        if durations is None:
+            print(f"  startup[{name}]: falhou")
+            continue
+        times_after = os.times()
+        wall = sum(durations)
+        cpu = (times_after.children_user - times_before.children_user
+               + times_after.children_system - times_before.children_system)
+        durations.sort()
+        reports[f'startup[{name}]'] = {
+            'operations': len(durations),
+            'wall_seconds': round(wall, 4),
+            'ops_per_second': round(len(durations) / wall, 2),
+            'cpu_seconds': round(cpu, 4),
+            'cpu_percent': round(cpu / wall * 100, 1),
+            'rss_mb': None,
+            'rss_delta_mb': None,
+            'median_ms': round(durations[len(durations) // 2] * 1000, 1),
+            'min_ms': round(durations[0] * 1000, 1),
+            'max_ms': round(durations[-1] * 1000, 1),
+        }
+        print(f"  startup[{name}]: mediana {reports[f'startup[{name}]']['median_ms']} ms")
+    return reports
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def previous_results(exclude):
+    """Último arquivo de resultados salvo antes deste (None se não houver)"""
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    files = sorted(name for name in os.listdir(RESULTS_DIR) if name.endswith('.json') and name != exclude)
+    if not files:
+        return None
+    with open(os.path.join(RESULTS_DIR, files[-1]), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_report(results, previous):
+    """Tabela dos resultados, com a variação em relação à execução anterior"""
+    print(f"\n{'benchmark':<24} {'ops':>7} {'tempo(s)':>9} {'ops/s':>10} {'CPU(s)':>8} {'CPU%':>6} "
+          f"{'RSS(MB)':>8} {'Δ ops/s':>9}")
+    for name, report in results['benchmarks'].items():
+        change = ''
+        old = (previous or {}).get('benchmarks', {}).get(name)
+        if old and old.get('ops_per_second') and report.get('ops_per_second'):
+            change = f"{(report['ops_per_second'] / old['ops_per_second'] - 1) * 100:+.1f}%"
+        print(f"{name:<24} {report['operations']:>7} {report['wall_seconds']:>9.3f} "
+              f"{report['ops_per_second'] or 0:>10.1f} {report['cpu_seconds']:>8.3f} "
+              f"{report['cpu_percent'] or 0:>6.1f} {report['rss_mb'] or 0:>8.1f} {change:>9}")
+    if previous:
+        print(f"\nComparado com {previous.get('revision') or '?'} de {previous.get('date')}"
+              f"{'' if previous.get('parameters') == results['parameters'] else ' (parâmetros diferentes)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks do monitor contra uma frota falsa em loopback')
+    parser.add_argument('--servers', type=int, default=500, help='servidores falsos na frota')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='proporção de tipos, ex.: ok=0.8,slow=0.05,error=0.05,hang=0.05,closed=0.03,blackhole=0.02')
+    parser.add_argument('--latency', type=float, default=0.02, help='latência HTTP dos servidores ok (s)')
+    parser.add_argument('--slow-latency', type=float, default=1.0, help='latência HTTP dos servidores lentos (s)')
+    parser.add_argument('--body-size', type=int, default=20000, help='tamanho da página HTTP (bytes)')
+    parser.add_argument('--backends', default='legacy,async', help='backends medidos no monitor_loop')
+    parser.add_argument('--only', default='monitor_loop,check_port,check_http,history,startup,results',
+                        help='benchmarks a executar')
+    parser.add_argument('--ping', choices=('real', 'skip'), default='real',
+                        help="'skip' troca o ping por sucesso imediato (mede só portas e HTTP)")
+    parser.add_argument('--max-probes', type=int, default=CONFIG['max_concurrent_probes'],
+                        help='max_concurrent_probes')
+    parser.add_argument('--port-timeout', type=float, default=2, help='port_timeout (s)')
+    parser.add_argument('--http-timeout', type=float, default=3, help='http_timeout (s)')
+    parser.add_argument('--http-rounds', type=int, default=2, help='passadas sobre as URLs no check_http')
+    parser.add_argument('--history-records', type=int, default=100000, help='registros no benchmark do histórico')
+    parser.add_argument('--result-records', type=int, default=100000,
+                        help='resultados em memória no benchmark dos registros')
+    parser.add_argument('--startup-runs', type=int, default=10, help='processos medidos em cada cenário de startup')
+    parser.add_argument('--sweep-timeout', type=float, default=600, help='tempo máximo de um ciclo (s)')
+    parser.add_argument('--no-save', action='store_true', help='não salvar os resultados')
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    CONFIG.update(max_concurrent_probes=args.max_probes, port_timeout=args.port_timeout,
+                  http_timeout=args.http_timeout, email_alerts=False, sound_alerts=False,
+                  status_api=False)
+    selected = args.only.split(',')
+    results = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('no_save', 'only')},
+        'benchmarks': {},
+    }
+
+    # Arquivos gerados pelo monitor (log, histórico) ficam num diretório temporário
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='monitor-bench-') as tmp:
+        os.chdir(tmp)
+        CONFIG.update(log_file=os.path.join(tmp, 'monitor.log'),
+                      csv_file=os.path.join(tmp, 'monitor_history.csv'),
+                      history_db_file=os.path.join(tmp, 'monitor_history.db'))
+        try:
+            if set(selected) & {'monitor_loop', 'check_port', 'check_http'}:
+                with FakeFleet(args.servers, args.mix, args.latency, args.slow_latency, args.body_size) as fleet:
+                    print(f"Frota falsa: {len(fleet.servers)} servidores")
+                    if 'monitor_loop' in selected:
+                        for backend in args.backends.split(','):
+                            print(f"monitor_loop ({backend})...")
+                            results['benchmarks'][f'monitor_loop[{backend}]'] = bench_monitor_loop(
+                                fleet.servers, backend, args)
+                    if 'check_port' in selected:
+                        print("check_port...")
+                        results['benchmarks']['check_port'] = bench_check_port(fleet.servers, args)
+                    if 'check_http' in selected:
+                        print("check_http...")
+                        results['benchmarks']['check_http'] = bench_check_http(fleet.servers, args)
+            if 'history' in selected:
+                print("history...")
+                results['benchmarks']['history'] = bench_history(args)
+            if 'results' in selected:
+                print("results...")
+                results['benchmarks'].update(bench_results(args))
+            if 'startup' in selected:
+                print("startup...")
+                results['benchmarks'].update(bench_startup(args))
+        finally:
+            logging.shutdown()
+            os.chdir(workdir)
+
+    filename = datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    print_report(results, previous_results(filename))
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados salvos em {path}")
+
+
+if __name__ == '__main__':
+    main()
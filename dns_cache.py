@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de resolução DNS do Monitorador de Servidores GlassFish
+Um nome é resolvido uma vez e reaproveitado por todas as verificações do servidor
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from results import CheckResult
+
+
+def is_ip_address(host):
+    """True se `host` já é um endereço IP (não precisa de DNS)"""
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DnsEntry:
+    """Resultado de uma resolução guardado no cache"""
+
+    __slots__ = ('address', 'error', 'resolved_at', 'expires', 'lookup_time', 'refreshing')
+
+    def __init__(self, address, error, resolved_at, ttl, lookup_time):
+        self.address = address  # None = resolução falhou (cache negativo)
+        self.error = error
+        self.resolved_at = resolved_at
+        self.expires = resolved_at + ttl
+        self.lookup_time = lookup_time  # Duração (ms) da última consulta real ao DNS
+        self.refreshing = False
+
+
+class DnsCache:
+    """Resolvedor compartilhado com cache
+
+    - endereços resolvidos valem por `dns_ttl` segundos e falhas por
+      `dns_negative_ttl` (um nome inexistente não é consultado a cada verificação);
+    - passada a fração `dns_refresh_ahead` do TTL, o nome é renovado em
+      segundo plano e as verificações continuam usando o endereço em cache;
+      se a renovação falhar, o endereço anterior vale até expirar;
+    - verificações simultâneas do mesmo nome esperam uma única consulta;
+    - o campo 'ip' do servidor fixa o endereço e dispensa o DNS.
+
+    Cada resolução devolve um CheckResult, como as demais verificações,
+    com 'response_time' (ms) gasto esperando o DNS nesta verificação.
+    """
+
+    def __init__(self, config, logger=None):
+        self.config = config
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def _result(self, address, source, response_time=0, error=None, lookup_time=None):
+        if address is None:
+            return CheckResult(success=False, response_time=response_time, source=source, lookup_time=lookup_time,
+                               error=error)
+        return CheckResult(success=True, address=address, response_time=response_time, source=source,
+                           lookup_time=lookup_time)
+
+    def lookup(self, host, pinned=None):
+        """Resolução sem bloquear: endereço fixo, IP literal ou cache válido; None se for preciso consultar o DNS"""
+        if pinned or is_ip_address(host):
+            # DNS não consultado: fica fora das medidas de latência
+            result = self._result(pinned or host, 'fixo' if pinned else 'literal')
+            result.status = 'IGNORADO'
+            return result
+        if not self.config['dns_cache']:
+            return None
+
+        key = host.lower()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.expires:
+                return None
+            self.hits += 1
+            refresh = (entry.address is not None and not entry.refreshing
+                       and now >= entry.resolved_at + (entry.expires - entry.resolved_at) * self.config['dns_refresh_ahead'])
+            if refresh:
+                entry.refreshing = True
+        if refresh:
+            self._schedule_refresh(key)
+        return self._result(entry.address, 'cache', error=entry.error, lookup_time=entry.lookup_time)
+
+    def resolve(self, host, pinned=None):
+        """Resolve `host` (bloqueia só quando o nome não está em cache)"""
+        result = self.lookup(host, pinned)
+        if result is not None:
+            return result
+
+        key = host.lower()
+        start_time = time.perf_counter()
+        with self._lock:
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+                self.misses += 1
+        if owner:
+            try:
+                entry = self._lookup(key)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                event.set()
+            source = 'dns'
+        else:
+            # Outra verificação já está consultando este nome: aproveitar a resposta
+            event.wait(self.config['check_deadline'] or None)
+            with self._lock:
+                entry = self._entries.get(key)
+            source = 'cache'
+        response_time = round((time.perf_counter() - start_time) * 1000, 1)
+        if entry is None:
+            return self._result(None, source, response_time, 'Sem resposta do DNS')
+        return self._result(entry.address, source, response_time, entry.error, entry.lookup_time)
+
+    def _lookup(self, key):
+        """Consulta o DNS e atualiza o cache"""
+        start_time = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(key, None, socket.AF_INET, socket.SOCK_STREAM)
+            address, error = infos[0][4][0], None
+        except (OSError, UnicodeError) as e:
+            address, error = None, f"Falha na resolução DNS: {e}"
+        lookup_time = round((time.perf_counter() - start_time) * 1000, 1)
+
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.get(key)
+            if address is None and previous is not None and previous.address and now < previous.expires:
+                # Renovação falhou: manter o endereço anterior até expirar
+                previous.refreshing = False
+                return previous
+            ttl = self.config['dns_ttl'] if address else self.config['dns_negative_ttl']
+            entry = self._entries[key] = DnsEntry(address, error, now, ttl, lookup_time)
+
+        if self.logger and previous is not None and previous.address and address and previous.address != address:
+            self.logger.info(f"DNS: {key} mudou de {previous.address} para {address}")
+        return entry
+
+    def _schedule_refresh(self, key):
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dns-refresh')
+            refresher = self._refresher
+        try:
+            refresher.submit(self._refresh, key)
+        except RuntimeError:
+            pass  # Cache parado
+
+    def _refresh(self, key):
+        try:
+            self._lookup(key)
+            self.refreshes += 1
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Erro ao renovar DNS de {key}: {e}")
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+
+    def retain(self, hosts):
+        """Descarta do cache os nomes que não estão em `hosts`"""
+        hosts = {host.lower() for host in hosts}
+        with self._lock:
+            for key in [key for key in self._entries if key not in hosts]:
+                del self._entries[key]
+
+    def snapshot(self):
+        """Contadores do cache para o diagnóstico"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'negative': sum(1 for entry in self._entries.values() if entry.address is None),
+                'hits': self.hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+            }
+
+    def stop(self):
+        """Encerra as renovações em segundo plano"""
+        with self._lock:
+            refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            refresher.shutdown(wait=False, cancel_futures=True)
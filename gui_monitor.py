@@ -7,18 +7,34 @@ Painel de telemetria em tempo real com cadastro de servidores
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import threading
-import time
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import matplotlib.animation as animation
-from collections import deque
 import json
+import os
 from monitor import ServerMonitor, SERVERS, CONFIG
+from telemetry import TelemetryStore
+from server_index import ServerIndex
+from server_config import diff_servers
 
 class ServerMonitorGUI:
+    # Opções de filtro e ordenação da tabela de servidores (chave do índice -> texto)
+    STATUS_FILTER_LABELS = {'todos': 'Todos', 'problemas': 'Só com problema (não ONLINE)'}
+    SORT_LABELS = {
+        'cadastro': 'Ordem do cadastro',
+        'latencia_desc': 'Latência (maior primeiro)',
+        'latencia_asc': 'Latência (menor primeiro)',
+        'nome': 'Nome',
+    }
+    SERVERS_ROW_HEIGHT = 22  # Altura fixa das linhas: permite calcular quantas cabem na tela
+    # Períodos da aba de histórico (texto -> segundos)
+    HISTORY_RANGES = {
+        'Última hora': 3600,
+        'Últimas 6 horas': 6 * 3600,
+        'Último dia': 86400,
+        'Últimos 7 dias': 7 * 86400,
+        'Últimos 30 dias': 30 * 86400,
+        'Últimos 365 dias': 365 * 86400,
+    }
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Monitor de Servidores GlassFish")
@@ -29,18 +45,45 @@ class ServerMonitorGUI:
         self.monitor = ServerMonitor()
         self.servers = SERVERS.copy()
         
-        # Dados para telemetria
-        self.telemetry_data = {}
+        # Tabela virtual: o índice guarda todos os servidores e o Treeview só as
+        # linhas visíveis (itens reaproveitados, com os valores exibidos em cada uma)
+        self.server_index = ServerIndex()
+        self.row_items = []
+        self.row_values = []
+        self.row_names = []
+        self.view_offset = 0  # Posição da primeira linha visível na lista filtrada
+        self.visible_rows = 15
+        self.selected_server = None
+        
+        # Dados para telemetria: todos os servidores, alimentados pelo monitor
         self.max_data_points = 50
+        self.telemetry = TelemetryStore(capacity=self.max_data_points)
+        self.monitor.add_listener(self.telemetry.add_result)
         
         # Variáveis de controle
         self.monitoring_active = False
-        self.update_thread = None
+        
+        # Último snapshot de status lido pela thread do Tk e sua versão
+        self.latest_results = self.monitor.server_status
+        self.status_version = self.latest_results.version
+        self.gui_poll_interval = 250  # ms entre verificações da fila de resultados
+        self.diagnostics_interval = 2000  # ms entre atualizações da aba de diagnóstico
+        
+        # Gráficos de telemetria: matplotlib só é carregado quando a aba for exibida
+        self.fig = None
+        self.canvas = None
+        
+        # Aba de histórico: figura criada na primeira exibição; history_end None = até agora
+        self.history_fig = None
+        self.history_canvas = None
+        self.history_end = None
+        self.history_first = {}  # Início do histórico por servidor, relido a cada exibição da aba
         
         self.setup_ui()
-        self.setup_telemetry()
         self.load_servers_config()  # Carregar servidores do arquivo JSON
         self.load_servers()  # Atualizar interface
+        self.root.after(self.gui_poll_interval, self.drain_results)
+        self.root.after(self.diagnostics_interval, self.refresh_diagnostics)
         
     def setup_ui(self):
         """Configura a interface do usuário"""
@@ -97,17 +140,51 @@ class ServerMonitorGUI:
         # Aba de Telemetria
         self.setup_telemetry_tab()
         
+        # Aba de Histórico
+        self.setup_history_tab()
+        
         # Aba de Logs
         self.setup_logs_tab()
+        
+        # Aba de Diagnóstico
+        self.setup_diagnostics_tab()
     
     def setup_servers_tab(self):
         """Configura a aba de status dos servidores"""
         servers_frame = ttk.Frame(self.notebook)
         self.notebook.add(servers_frame, text="📊 Status dos Servidores")
         
-        # Treeview para mostrar servidores
+        # Filtro e ordenação (aplicados ao índice em memória)
+        filter_frame = ttk.Frame(servers_frame)
+        filter_frame.pack(fill=tk.X, pady=(5, 5))
+        
+        ttk.Label(filter_frame, text="Mostrar:").pack(side=tk.LEFT, padx=(0, 5))
+        self.status_filter_var = tk.StringVar(value=self.STATUS_FILTER_LABELS['todos'])
+        status_filter_combo = ttk.Combobox(filter_frame, textvariable=self.status_filter_var, state='readonly',
+                                           values=list(self.STATUS_FILTER_LABELS.values()), width=22)
+        status_filter_combo.pack(side=tk.LEFT, padx=(0, 10))
+        status_filter_combo.bind('<<ComboboxSelected>>', self.on_servers_filter_change)
+        
+        ttk.Label(filter_frame, text="Host começa com:").pack(side=tk.LEFT, padx=(0, 5))
+        self.host_filter_var = tk.StringVar()
+        self.host_filter_var.trace_add('write', self.on_servers_filter_change)
+        ttk.Entry(filter_frame, textvariable=self.host_filter_var, width=20).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Label(filter_frame, text="Ordenar por:").pack(side=tk.LEFT, padx=(0, 5))
+        self.sort_var = tk.StringVar(value=self.SORT_LABELS['cadastro'])
+        sort_combo = ttk.Combobox(filter_frame, textvariable=self.sort_var, state='readonly',
+                                  values=list(self.SORT_LABELS.values()), width=22)
+        sort_combo.pack(side=tk.LEFT)
+        sort_combo.bind('<<ComboboxSelected>>', self.on_servers_filter_change)
+        
+        self.servers_count_label = ttk.Label(filter_frame, text="")
+        self.servers_count_label.pack(side=tk.RIGHT)
+        
+        # Treeview para mostrar servidores: só as linhas visíveis existem no widget
         columns = ('Nome', 'Host', 'Ping', 'Porta App', 'Porta Admin', 'HTTP', 'Status', 'Última Verificação')
-        self.servers_tree = ttk.Treeview(servers_frame, columns=columns, show='headings', height=15)
+        ttk.Style().configure('Servers.Treeview', rowheight=self.SERVERS_ROW_HEIGHT)
+        self.servers_tree = ttk.Treeview(servers_frame, columns=columns, show='headings', height=15,
+                                         style='Servers.Treeview', selectmode='browse')
         
         # Configurar colunas
         for col in columns:
@@ -123,13 +200,20 @@ class ServerMonitorGUI:
             else:
                 self.servers_tree.column(col, width=80)
         
-        # Scrollbar para treeview
-        scrollbar = ttk.Scrollbar(servers_frame, orient=tk.VERTICAL, command=self.servers_tree.yview)
-        self.servers_tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar da lista virtual: rola o índice, não o Treeview
+        self.servers_scrollbar = ttk.Scrollbar(servers_frame, orient=tk.VERTICAL, command=self.on_servers_scroll)
         
         # Pack treeview e scrollbar
         self.servers_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.servers_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.servers_tree.bind('<Configure>', self.on_servers_resize)
+        self.servers_tree.bind('<<TreeviewSelect>>', self.on_server_select)
+        self.servers_tree.bind('<MouseWheel>', self.on_servers_wheel)
+        self.servers_tree.bind('<Button-4>', self.on_servers_wheel)
+        self.servers_tree.bind('<Button-5>', self.on_servers_wheel)
+        self.servers_tree.bind('<Prior>', lambda event: self.scroll_servers(-self.visible_rows))
+        self.servers_tree.bind('<Next>', lambda event: self.scroll_servers(self.visible_rows))
         
         # Configurar tags para cores
         self.servers_tree.tag_configure('online', background='#d4edda')
@@ -140,6 +224,8 @@ class ServerMonitorGUI:
         """Configura a aba de telemetria"""
         telemetry_frame = ttk.Frame(self.notebook)
         self.notebook.add(telemetry_frame, text="📈 Telemetria")
+        self.telemetry_frame = telemetry_frame
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Frame para seleção de servidor
         select_frame = ttk.Frame(telemetry_frame)
@@ -157,7 +243,16 @@ class ServerMonitorGUI:
         self.telemetry_canvas_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
     
     def setup_telemetry(self):
-        """Configura os gráficos de telemetria"""
+        """Configura os gráficos de telemetria
+        
+        As linhas são criadas uma única vez e animadas por blitting: a cada
+        nova amostra só os dados das linhas mudam e apenas elas são
+        redesenhadas sobre o fundo (eixos, grades, títulos) já renderizado.
+        Chamado na primeira exibição da aba: o matplotlib não atrasa a abertura.
+        """
+        from matplotlib.figure import Figure
+        import matplotlib.dates as mdates
+        
         # Criar figura matplotlib
         self.fig = Figure(figsize=(12, 8), dpi=100)
         self.fig.suptitle('Telemetria do Servidor', fontsize=14, fontweight='bold')
@@ -168,21 +263,223 @@ class ServerMonitorGUI:
         self.ax3 = self.fig.add_subplot(2, 2, 3)
         self.ax4 = self.fig.add_subplot(2, 2, 4)
         
-        # Configurar eixos
-        self.ax1.set_title('Status de Conectividade')
-        self.ax1.set_ylabel('Status')
+        # Gráfico 1: Status de Ping
+        self.ping_line, = self.ax1.plot([], [], 'b-', label='Ping', linewidth=2, animated=True)
+        self.ax1.set_title('Status de Conectividade (Ping)')
+        self.ax1.set_ylabel('Status (0=Offline, 1=Online)')
+        self.ax1.set_ylim(-0.1, 1.1)
         
-        self.ax2.set_title('Tempo de Resposta HTTP (ms)')
+        # Gráfico 2: Tempo de resposta HTTP
+        self.http_line, = self.ax2.plot([], [], 'g-', label='HTTP Response', linewidth=2, animated=True)
+        self.ax2.set_title('Tempo de Resposta HTTP')
         self.ax2.set_ylabel('Tempo (ms)')
+        self.ax2.set_ylim(0, 100)
         
-        self.ax3.set_title('Disponibilidade das Portas')
-        self.ax3.set_ylabel('Status')
+        # Gráfico 3: Status das portas
+        self.app_port_line, = self.ax3.plot([], [], 'r-', label='Porta App', linewidth=2, animated=True)
+        self.admin_port_line, = self.ax3.plot([], [], 'orange', label='Porta Admin', linewidth=2, animated=True)
+        self.ax3.set_title('Status das Portas')
+        self.ax3.set_ylabel('Status (0=Fechada, 1=Aberta)')
+        self.ax3.set_ylim(-0.1, 1.1)
+        self.ax3.legend()
         
-        self.ax4.set_title('Histórico de Status')
-        self.ax4.set_ylabel('Uptime %')
+        # Gráfico 4: Uptime geral
+        self.uptime_line, = self.ax4.plot([], [], 'purple', linewidth=2, animated=True)
+        self.ax4.set_title('Disponibilidade Geral (%)')
+        self.ax4.set_ylabel('Uptime (%)')
+        self.ax4.set_ylim(0, 105)
         
-        # Canvas para matplotlib
+        # Formatar eixos X
+        local_tz = datetime.now().astimezone().tzinfo
+        self.telemetry_epoch = mdates.date2num(datetime(1970, 1, 1))
+        for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
+            ax.grid(True, alpha=0.3)
+            ax.xaxis_date(local_tz)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S', tz=local_tz))
+            ax.tick_params(axis='x', rotation=45)
+        
+        self.telemetry_lines = [self.ping_line, self.http_line, self.app_port_line,
+                                self.admin_port_line, self.uptime_line]
+        
+        # Canvas para matplotlib (criado no primeiro desenho)
         self.canvas = None
+        self.telemetry_background = None
+        self.telemetry_rendered = None  # (servidor, versão dos dados) do último desenho
+    
+    def setup_history_tab(self):
+        """Configura a aba de histórico (lido do SQLite por período)"""
+        history_frame = ttk.Frame(self.notebook)
+        self.notebook.add(history_frame, text="🕘 Histórico")
+        self.history_frame = history_frame
+        
+        select_frame = ttk.Frame(history_frame)
+        select_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(select_frame, text="Servidor:").pack(side=tk.LEFT)
+        self.history_server_var = tk.StringVar()
+        self.history_combo = ttk.Combobox(select_frame, textvariable=self.history_server_var,
+                                          state="readonly", width=30)
+        self.history_combo.pack(side=tk.LEFT, padx=(5, 10))
+        self.history_combo.bind('<<ComboboxSelected>>', lambda event: self.load_history())
+        
+        ttk.Label(select_frame, text="Período:").pack(side=tk.LEFT)
+        self.history_range_var = tk.StringVar(value='Último dia')
+        range_combo = ttk.Combobox(select_frame, textvariable=self.history_range_var, state="readonly",
+                                   values=list(self.HISTORY_RANGES), width=18)
+        range_combo.pack(side=tk.LEFT, padx=(5, 10))
+        range_combo.bind('<<ComboboxSelected>>', lambda event: self.load_history())
+        
+        ttk.Button(select_frame, text="◀", width=3, command=lambda: self.shift_history(-1)).pack(side=tk.LEFT)
+        ttk.Button(select_frame, text="▶", width=3, command=lambda: self.shift_history(1)).pack(side=tk.LEFT)
+        ttk.Button(select_frame, text="Agora", command=self.history_now).pack(side=tk.LEFT, padx=(5, 10))
+        
+        # Posição na linha do tempo: do início do histórico (0) até agora (1)
+        self.history_position_var = tk.DoubleVar(value=1.0)
+        history_scale = ttk.Scale(select_frame, from_=0.0, to=1.0, variable=self.history_position_var,
+                                  orient=tk.HORIZONTAL, length=200)
+        history_scale.pack(side=tk.LEFT, padx=(0, 10))
+        history_scale.bind('<ButtonRelease-1>', self.on_history_scrub)
+        
+        self.history_info_label = ttk.Label(select_frame, text="")
+        self.history_info_label.pack(side=tk.LEFT)
+        
+        self.history_canvas_frame = ttk.Frame(history_frame)
+        self.history_canvas_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def setup_history_plot(self):
+        """Cria os gráficos do histórico (na primeira exibição da aba)"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.history_fig = Figure(figsize=(12, 8), dpi=100)
+        self.history_latency_ax = self.history_fig.add_subplot(2, 1, 1)
+        self.history_availability_ax = self.history_fig.add_subplot(2, 1, 2, sharex=self.history_latency_ax)
+        
+        self.history_canvas = FigureCanvasTkAgg(self.history_fig, self.history_canvas_frame)
+        self.history_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
+    def history_visible(self):
+        """Indica se a aba de histórico é a aba exibida"""
+        return self.notebook.select() == str(self.history_frame)
+    
+    def history_window(self):
+        """Início e fim (datetime) do período exibido"""
+        span = timedelta(seconds=self.HISTORY_RANGES[self.history_range_var.get()])
+        end = self.history_end or datetime.now()
+        return end - span, end
+    
+    def load_history(self):
+        """Lê do histórico só o período exibido, reduzido à largura do gráfico em pixels"""
+        store = self.monitor.history_store
+        if store is None:
+            self.history_info_label.config(text="Histórico SQLite desativado (history_backends)")
+            return
+        server_name = self.history_server_var.get()
+        if not server_name:
+            return
+        if self.history_fig is None:
+            self.setup_history_plot()
+        
+        start, end = self.history_window()
+        # Uma fatia por pixel de largura (antes do primeiro layout, largura padrão)
+        width = self.history_canvas_frame.winfo_width()
+        points = width if width > 100 else 1000
+        try:
+            slots = list(store.query_decimated(server_name, start, end, points))
+        except Exception as e:
+            self.log_message(f"Erro ao ler histórico de {server_name}: {e}")
+            return
+        
+        import matplotlib.dates as mdates
+        times = mdates.date2num([slot['timestamp'] for slot in slots])
+        latency_ax = self.history_latency_ax
+        availability_ax = self.history_availability_ax
+        latency_ax.clear()
+        availability_ax.clear()
+        
+        # Faixa mín–máx de cada fatia: picos continuam visíveis em períodos longos
+        for label, key, color in (('HTTP', 'http', 'g'), ('Ping', 'ping', 'b')):
+            low = [slot[f'{key}_min_ms'] if slot[f'{key}_min_ms'] is not None else float('nan') for slot in slots]
+            high = [slot[f'{key}_max_ms'] if slot[f'{key}_max_ms'] is not None else float('nan') for slot in slots]
+            latency_ax.fill_between(times, low, high, color=color, alpha=0.3, step='post', label=f'{label} (mín–máx)')
+            latency_ax.plot(times, high, color=color, linewidth=0.8, drawstyle='steps-post')
+        latency_ax.set_title(f'Latência - {server_name}')
+        latency_ax.set_ylabel('Tempo (ms)')
+        latency_ax.legend(loc='upper left')
+        
+        availability = [slot['availability'] if slot['availability'] is not None else float('nan') for slot in slots]
+        availability_ax.plot(times, availability, color='purple', linewidth=1, drawstyle='steps-post')
+        availability_ax.set_title('Disponibilidade (%)')
+        availability_ax.set_ylim(0, 105)
+        
+        local_tz = datetime.now().astimezone().tzinfo
+        for ax in [latency_ax, availability_ax]:
+            # clear() desfaz a formatação de datas: reaplicar a cada leitura
+            locator = mdates.AutoDateLocator(tz=local_tz)
+            ax.xaxis_date(local_tz)
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator, tz=local_tz))
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(mdates.date2num(start), mdates.date2num(end))
+        self.history_fig.tight_layout()
+        self.history_canvas.draw_idle()
+        
+        resolution = slots[0]['resolution'] if slots else 0
+        source = {0: 'amostras', 60: 'agregados de 1 min', 3600: 'agregados de 1 h', 86400: 'agregados de 1 dia'}
+        self.history_info_label.config(
+            text=f"{start:%d/%m/%Y %H:%M} a {end:%d/%m/%Y %H:%M} · {len(slots)} pontos ({source[resolution]})")
+        self.update_history_position(store, server_name, end)
+    
+    def update_history_position(self, store, server_name, end):
+        """Posiciona a barra da linha do tempo no fim do período exibido"""
+        first = self.history_first_timestamp(store, server_name)
+        if first is None or self.history_end is None:
+            self.history_position_var.set(1.0)
+            return
+        total = (datetime.now() - first).total_seconds()
+        self.history_position_var.set(min(1.0, max(0.0, (end - first).total_seconds() / total)) if total > 0 else 1.0)
+    
+    def history_first_timestamp(self, store, server_name):
+        """Início do histórico do servidor, guardado até a próxima exibição da aba"""
+        if server_name not in self.history_first:
+            self.history_first[server_name] = store.first_timestamp(server_name)
+        return self.history_first[server_name]
+    
+    def shift_history(self, direction):
+        """Anda meio período para trás (-1) ou para frente (1)"""
+        start, end = self.history_window()
+        end += (end - start) / 2 * direction
+        self.history_end = None if end >= datetime.now() else end
+        self.load_history()
+    
+    def history_now(self):
+        """Volta ao período que termina agora"""
+        self.history_end = None
+        self.load_history()
+    
+    def on_history_scrub(self, event=None):
+        """Ao soltar a barra da linha do tempo, carrega o período que termina na posição escolhida"""
+        store = self.monitor.history_store
+        first = self.history_first_timestamp(store, self.history_server_var.get()) if store else None
+        position = self.history_position_var.get()
+        if first is None or position >= 0.999:
+            self.history_end = None
+        else:
+            now = datetime.now()
+            span = timedelta(seconds=self.HISTORY_RANGES[self.history_range_var.get()])
+            self.history_end = max(first + span, first + (now - first) * position)
+        self.load_history()
+    
+    def refresh_history_servers(self):
+        """Servidores do combo de histórico: os cadastrados e os que só existem no histórico"""
+        self.history_first.clear()
+        names = [server['name'] for server in self.servers]
+        if self.monitor.history_store is not None:
+            known = set(names)
+            names += [name for name in self.monitor.history_store.server_names() if name not in known]
+        self.history_combo['values'] = names
+        if names and self.history_server_var.get() not in names:
+            self.history_combo.set(names[0])
     
     def setup_logs_tab(self):
         """Configura a aba de logs"""
@@ -203,34 +500,110 @@ class ServerMonitorGUI:
                                    command=self.clear_logs)
         clear_logs_btn.pack(side=tk.BOTTOM, pady=5)
     
+    def setup_diagnostics_tab(self):
+        """Configura a aba de diagnóstico do motor de verificação"""
+        diagnostics_frame = ttk.Frame(self.notebook)
+        self.notebook.add(diagnostics_frame, text="🩺 Diagnóstico")
+        self.diagnostics_frame = diagnostics_frame
+        
+        # Modo da instrumentação e botão para zerar
+        control_frame = ttk.Frame(diagnostics_frame)
+        control_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(control_frame, text="Instrumentação:").pack(side=tk.LEFT)
+        self.diagnostics_mode_var = tk.StringVar(value=self.monitor.stats.mode)
+        mode_combo = ttk.Combobox(control_frame, textvariable=self.diagnostics_mode_var,
+                                  values=['off', 'basic', 'full'], state="readonly", width=10)
+        mode_combo.pack(side=tk.LEFT, padx=(5, 0))
+        mode_combo.bind('<<ComboboxSelected>>', self.on_diagnostics_mode_change)
+        
+        ttk.Button(control_frame, text="🔄 Zerar Medidas",
+                   command=self.reset_diagnostics).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Texto com as medidas
+        self.diagnostics_text = tk.Text(diagnostics_frame, wrap=tk.NONE, height=25, font=('Courier', 10))
+        self.diagnostics_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.diagnostics_text.configure(state=tk.DISABLED)
+    
+    def refresh_diagnostics(self):
+        """Atualiza a aba de diagnóstico (apenas quando visível)"""
+        try:
+            if self.notebook.select() == str(self.diagnostics_frame):
+                text = self.format_diagnostics(self.monitor.get_diagnostics())
+                self.diagnostics_text.configure(state=tk.NORMAL)
+                self.diagnostics_text.delete(1.0, tk.END)
+                self.diagnostics_text.insert(tk.END, text)
+                self.diagnostics_text.configure(state=tk.DISABLED)
+        except Exception as e:
+            self.log_message(f"Erro ao atualizar diagnóstico: {e}")
+        finally:
+            self.root.after(self.diagnostics_interval, self.refresh_diagnostics)
+    
+    def format_diagnostics(self, diagnostics):
+        """Texto da aba de diagnóstico a partir de ServerMonitor.get_diagnostics()"""
+        def fmt(value, unit=''):
+            return '-' if value is None else f"{value:.2f}{unit}"
+        
+        def stats_line(label, stats, unit):
+            line = (f"{label:<24} n={stats['count']:<7} últ={fmt(stats['last'], unit):<10} "
+                    f"méd={fmt(stats['mean'], unit):<10} máx={fmt(stats['max'], unit):<10}")
+            if 'p99' in stats:
+                line += f" p50={fmt(stats['p50'], unit):<10} p99={fmt(stats['p99'], unit)}"
+            return line
+        
+        next_check = diagnostics['next_check_in']
+        lines = [
+            f"Modo: {diagnostics['mode']}    Servidores: {diagnostics['servers']}    "
+            f"Em andamento: {diagnostics['in_flight']} (máx {diagnostics['max_in_flight']})    "
+            f"Próxima verificação em: {fmt(next_check, 's')}",
+            f"Histórico: {diagnostics['history_queue']} na fila, {diagnostics['history_dropped']} descartados",
+            f"DNS: {diagnostics['dns']['entries']} nomes em cache ({diagnostics['dns']['negative']} com falha), "
+            f"{diagnostics['dns']['hits']} acertos, {diagnostics['dns']['misses']} consultas, "
+            f"{diagnostics['dns']['refreshes']} renovações",
+            '',
+            stats_line('Ciclo completo', diagnostics['cycle_seconds'], 's'),
+            stats_line('Atraso do agendador', diagnostics['scheduler_lag_seconds'], 's'),
+            f"{'':<24} estouros do intervalo: {diagnostics['overruns']}",
+            stats_line('Verificação (servidor)', diagnostics['probe_seconds'], 's'),
+            f"{'':<24} erros: {diagnostics['probe_errors']}",
+            '',
+            'Latência por tipo de verificação:',
+        ]
+        for check, stats in diagnostics['checks_ms'].items():
+            lines.append(stats_line(f"  {check}", stats, 'ms') + f" falhas={diagnostics['check_failures'][check]}")
+        return '\n'.join(lines)
+    
+    def on_diagnostics_mode_change(self, event=None):
+        """Troca o modo da instrumentação"""
+        self.monitor.set_instrumentation_mode(self.diagnostics_mode_var.get())
+        self.log_message(f"Instrumentação: modo {self.diagnostics_mode_var.get()}")
+    
+    def reset_diagnostics(self):
+        """Zera as medidas da instrumentação"""
+        self.monitor.stats.reset()
+    
     def load_servers(self):
         """Carrega a lista de servidores na interface"""
-        # Limpar treeview
-        for item in self.servers_tree.get_children():
-            self.servers_tree.delete(item)
+        self.sync_server_rows()
         
-        # Adicionar servidores
-        for server in self.servers:
-            self.servers_tree.insert('', tk.END, values=(
-                server['name'], server['host'], '-', '-', '-', '-', 'Não verificado', '-'
-            ))
+        # Aplicar inclusões/edições/remoções ao agendador sem reiniciar o monitoramento
+        if self.monitoring_active:
+            self.monitor.set_servers(self.servers)
         
         # Atualizar combo de telemetria
         server_names = [server['name'] for server in self.servers]
+        self.telemetry.retain(server_names)
         self.telemetry_combo['values'] = server_names
-        if server_names:
+        if server_names and self.telemetry_server_var.get() not in server_names:
             self.telemetry_combo.set(server_names[0])
     
     def start_monitoring(self):
         """Inicia o monitoramento"""
         if not self.monitoring_active:
             self.monitoring_active = True
-            self.monitor.servers = self.servers
+            self.monitor.set_servers(self.servers)
             self.monitor.start_monitoring()
-            
-            # Iniciar thread de atualização da GUI
-            self.update_thread = threading.Thread(target=self.update_gui_loop, daemon=True)
-            self.update_thread.start()
+            self.update_servers_display()
             
             # Atualizar botões
             self.start_btn.config(state=tk.DISABLED)
@@ -239,11 +612,12 @@ class ServerMonitorGUI:
             
             self.log_message("Monitoramento iniciado")
     
-    def stop_monitoring(self):
-        """Para o monitoramento"""
+    def stop_monitoring(self, wait=False):
+        """Para o monitoramento (sem esperar alertas e histórico pendentes, salvo com wait=True)"""
         if self.monitoring_active:
             self.monitoring_active = False
-            self.monitor.stop_monitoring()
+            self.monitor.stop_monitoring(wait=wait)
+            self.update_servers_display()
             
             # Atualizar botões
             self.start_btn.config(state=tk.NORMAL)
@@ -252,208 +626,296 @@ class ServerMonitorGUI:
             
             self.log_message("Monitoramento parado")
     
-    def update_gui_loop(self):
-        """Loop de atualização da GUI"""
-        while self.monitoring_active:
-            try:
-                self.root.after(0, self.update_servers_display)
-                self.root.after(0, self.update_telemetry)
-                time.sleep(2)  # Atualizar a cada 2 segundos
-            except Exception as e:
-                print(f"Erro na atualização da GUI: {e}")
-                time.sleep(5)
-    
-    def update_servers_display(self):
-        """Atualiza a exibição dos servidores"""
-        # Salvar seleção atual
-        selected_items = self.servers_tree.selection()
-        selected_server_names = []
-        for item in selected_items:
-            values = self.servers_tree.item(item, 'values')
-            if values:
-                selected_server_names.append(values[0])  # Nome do servidor
-        
-        # Limpar treeview
-        for item in self.servers_tree.get_children():
-            self.servers_tree.delete(item)
-        
-        # Adicionar servidores com status atual
-        for server in self.servers:
-            name = server['name']
-            status_data = self.monitor.server_status.get(name, {})
-            
-            if status_data:
-                # Ping status com tempo de resposta
-                ping_data = status_data.get('ping', {})
-                if isinstance(ping_data, dict):
-                    if ping_data.get('success'):
-                        ping_status = f"✅ {ping_data['response_time']}ms"
-                    else:
-                        ping_status = f"❌ {ping_data.get('error', 'Failed')}"
-                else:
-                    ping_status = '✅' if ping_data else '❌'
-                
-                # App port status com número da porta e tempo de resposta
-                app_port_data = status_data.get('app_port', {})
-                app_port_number = server.get('app_port', 'N/A')
-                if isinstance(app_port_data, dict):
-                    if app_port_data.get('success'):
-                        app_port_status = f"✅ {app_port_number} ({app_port_data['response_time']}ms)"
-                    else:
-                        app_port_status = f"❌ {app_port_number} ({app_port_data.get('status', 'Falhou')})"
-                else:
-                    app_port_status = f"{'✅' if app_port_data else '❌'} {app_port_number}"
-                
-                # Admin port status com número da porta e tempo de resposta
-                admin_port_data = status_data.get('admin_port', {})
-                admin_port_number = server.get('admin_port', 'N/A')
-                if isinstance(admin_port_data, dict):
-                    if admin_port_data.get('success'):
-                        admin_port_status = f"✅ {admin_port_number} ({admin_port_data['response_time']}ms)"
-                    else:
-                        admin_port_status = f"❌ {admin_port_number} ({admin_port_data.get('status', 'Falhou')})"
-                else:
-                    admin_port_status = f"{'✅' if admin_port_data else '❌'} {admin_port_number}"
-                
-                # HTTP status (mantém formato atual)
-                http_status = '-'
-                if status_data.get('http'):
-                    http_data = status_data['http']
-                    if http_data['success']:
-                        http_status = f"✅ {http_data['status_code']}"
-                    else:
-                        http_status = f"❌ {http_data.get('error', 'Error')}"
-                
-                overall_status = status_data.get('status', 'UNKNOWN')
-                timestamp = status_data.get('timestamp', datetime.now())
-                last_check = timestamp.strftime('%H:%M:%S')
-                
-                # Determinar tag para cor
-                tag = 'online' if overall_status == 'ONLINE' else ('warning' if overall_status in ['ERRO_HTTP', 'PORTAS_FECHADAS'] else 'offline')
-                
-                item = self.servers_tree.insert('', tk.END, values=(
-                    name, server['host'], ping_status, app_port_status, 
-                    admin_port_status, http_status, overall_status, last_check
-                ), tags=(tag,))
-                
-                # Restaurar seleção se este servidor estava selecionado
-                if name in selected_server_names:
-                    self.servers_tree.selection_add(item)
-            else:
-                item = self.servers_tree.insert('', tk.END, values=(
-                    name, server['host'], '-', '-', '-', '-', 'Aguardando...', '-'
-                ))
-                
-                # Restaurar seleção se este servidor estava selecionado
-                if name in selected_server_names:
-                    self.servers_tree.selection_add(item)
-    
-    def update_telemetry(self):
-        """Atualiza os gráficos de telemetria"""
-        selected_server = self.telemetry_server_var.get()
-        if not selected_server or selected_server not in self.monitor.server_status:
-            return
+    def drain_results(self):
+        """Aplica o que mudou no status desde o último snapshot lido (no loop do Tk)
         
-        # Obter dados do servidor
-        status_data = self.monitor.server_status[selected_server]
-        
-        # Inicializar dados de telemetria se necessário
-        if selected_server not in self.telemetry_data:
-            self.telemetry_data[selected_server] = {
-                'timestamps': deque(maxlen=self.max_data_points),
-                'ping_status': deque(maxlen=self.max_data_points),
-                'http_response_times': deque(maxlen=self.max_data_points),
-                'app_port_status': deque(maxlen=self.max_data_points),
-                'admin_port_status': deque(maxlen=self.max_data_points),
-                'overall_status': deque(maxlen=self.max_data_points)
-            }
-        
-        # Adicionar novos dados
-        data = self.telemetry_data[selected_server]
-        data['timestamps'].append(datetime.now())
-        data['ping_status'].append(1 if status_data.get('ping') else 0)
-        data['app_port_status'].append(1 if status_data.get('app_port') else 0)
-        data['admin_port_status'].append(1 if status_data.get('admin_port') else 0)
-        data['overall_status'].append(1 if status_data.get('status') == 'ONLINE' else 0)
-        
-        # Tempo de resposta HTTP
-        http_time = 0
-        if status_data.get('http') and 'response_time' in status_data['http']:
-            http_time = status_data['http']['response_time'] * 1000  # Converter para ms
-        data['http_response_times'].append(http_time)
-        
-        # Atualizar gráficos
-        self.plot_telemetry_data(selected_server)
-    
-    def plot_telemetry_data(self, server_name):
-        """Plota os dados de telemetria"""
-        if server_name not in self.telemetry_data:
-            return
-        
-        data = self.telemetry_data[server_name]
+        Vários resultados do mesmo servidor são agrupados: a linha da tabela é
+        atualizada uma vez com o mais recente e os gráficos uma vez por lote.
+        Sem resultados novos, nada é redesenhado.
+        """
+        try:
+            if self.monitoring_active and self.monitor.servers is not self.servers:
+                self.apply_reloaded_servers()
+            changes = self.monitor.status_board.changes_since(self.status_version)
+            if changes.version != self.status_version:
+                self.latest_results = changes.snapshot
+                self.status_version = changes.version
+                self.update_servers_display(None if changes.full else set(changes.changed))
+            selected_server = self.telemetry_server_var.get()
+            if selected_server in changes.changed:
+                self.plot_telemetry_data(selected_server)
+        except Exception as e:
+            self.log_message(f"Erro na atualização da GUI: {e}")
+        finally:
+            self.root.after(self.gui_poll_interval, self.drain_results)
+    
+    def apply_reloaded_servers(self):
+        """Adota a lista recarregada pelo monitor quando servers_config.json muda fora da interface"""
+        diff = diff_servers(self.servers, self.monitor.servers)
+        self.servers = self.monitor.servers
+        self.load_servers()
+        if diff:
+            self.log_message(f"Lista de servidores recarregada de {CONFIG['servers_config_file']} ({diff.summary()})")
+    
+    def format_server_row(self, server):
+        """Valores exibidos e tag de cor da linha de um servidor"""
+        name = server['name']
+        result = self.latest_results.get(name)
+        
+        if result is None:
+            placeholder = 'Aguardando...' if self.monitoring_active else 'Não verificado'
+            return (name, server['host'], '-', '-', '-', '-', placeholder, '-'), None
+        
+        # Ping status com tempo de resposta
+        ping = result.ping
+        ping_status = f"✅ {ping.response_time}ms" if ping.success else f"❌ {ping.error or 'Failed'}"
+        
+        # App port status com número da porta e tempo de resposta
+        app_port = result.app_port
+        app_port_number = server.get('app_port', 'N/A')
+        if app_port.success:
+            app_port_status = f"✅ {app_port_number} ({app_port.response_time}ms)"
+        else:
+            app_port_status = f"❌ {app_port_number} ({app_port.status or 'Falhou'})"
         
-        if len(data['timestamps']) < 2:
-            return
+        # Admin port status com número da porta e tempo de resposta
+        admin_port = result.admin_port
+        admin_port_number = server.get('admin_port', 'N/A')
+        if admin_port.success:
+            admin_port_status = f"✅ {admin_port_number} ({admin_port.response_time}ms)"
+        else:
+            admin_port_status = f"❌ {admin_port_number} ({admin_port.status or 'Falhou'})"
         
-        # Limpar eixos
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
-        self.ax4.clear()
+        # HTTP status (mantém formato atual)
+        http_status = '-'
+        if result.http:
+            if result.http.success:
+                http_status = f"✅ {result.http.status_code}"
+            else:
+                http_status = f"❌ {result.http.error or 'Error'}"
         
-        timestamps = list(data['timestamps'])
+        overall_status = str(result.status)
+        last_check = result.timestamp.strftime('%H:%M:%S')
         
-        # Gráfico 1: Status de Ping
-        self.ax1.plot(timestamps, list(data['ping_status']), 'b-', label='Ping', linewidth=2)
-        self.ax1.set_title('Status de Conectividade (Ping)')
-        self.ax1.set_ylabel('Status (0=Offline, 1=Online)')
-        self.ax1.set_ylim(-0.1, 1.1)
-        self.ax1.grid(True, alpha=0.3)
+        # Determinar tag para cor
+        tag = 'online' if overall_status == 'ONLINE' else ('warning' if overall_status in ['ERRO_HTTP', 'PORTAS_FECHADAS'] else 'offline')
         
-        # Gráfico 2: Tempo de resposta HTTP
-        self.ax2.plot(timestamps, list(data['http_response_times']), 'g-', label='HTTP Response', linewidth=2)
-        self.ax2.set_title('Tempo de Resposta HTTP')
-        self.ax2.set_ylabel('Tempo (ms)')
-        self.ax2.grid(True, alpha=0.3)
+        return (name, server['host'], ping_status, app_port_status,
+                admin_port_status, http_status, overall_status, last_check), tag
+    
+    def sync_server_rows(self):
+        """Recria o índice com a lista de servidores atual e redesenha as linhas visíveis"""
+        self.server_index.set_servers(self.servers, self.latest_results)
+        if self.selected_server not in self.server_index:
+            self.selected_server = None
+        self.refresh_server_rows()
+    
+    def refresh_server_rows(self):
+        """Desenha a janela visível da lista filtrada
+        
+        O Treeview tem no máximo `visible_rows` itens, reaproveitados conforme
+        a rolagem; só as células com valor diferente são reescritas.
+        """
+        view = self.server_index.view()
+        total = len(view)
+        self.view_offset = max(0, min(self.view_offset, total - self.visible_rows))
+        names = view[self.view_offset:self.view_offset + self.visible_rows]
+        
+        # Ajustar a quantidade de itens ao número de linhas visíveis
+        while len(self.row_items) < len(names):
+            self.row_items.append(self.servers_tree.insert('', tk.END))
+            self.row_values.append((None, None))
+        while len(self.row_items) > len(names):
+            self.servers_tree.delete(self.row_items.pop())
+            self.row_values.pop()
+        
+        for slot, name in enumerate(names):
+            values, tag = self.format_server_row(self.server_index.server(name))
+            self.update_row_slot(slot, values, tag)
+        self.row_names = names
+        
+        # Seleção acompanha o servidor, não o item reaproveitado
+        selected_items = ()
+        if self.selected_server in names:
+            selected_items = (self.row_items[names.index(self.selected_server)],)
+        if self.servers_tree.selection() != selected_items:
+            self.servers_tree.selection_set(selected_items)
+        
+        if total:
+            self.servers_scrollbar.set(self.view_offset / total, (self.view_offset + len(names)) / total)
+        else:
+            self.servers_scrollbar.set(0, 1)
+        self.servers_count_label.config(text=f"{total} de {len(self.server_index)} servidores")
+    
+    def update_row_slot(self, slot, values, tag):
+        """Reescreve só as células (e a cor) que mudaram numa linha visível"""
+        item = self.row_items[slot]
+        old_values, old_tag = self.row_values[slot]
+        if old_values is None:
+            self.servers_tree.item(item, values=values, tags=(tag,) if tag else ())
+        else:
+            for column, old_value, value in zip(self.servers_tree['columns'], old_values, values):
+                if old_value != value:
+                    self.servers_tree.set(item, column, value)
+            if old_tag != tag:
+                self.servers_tree.item(item, tags=(tag,) if tag else ())
+        self.row_values[slot] = (values, tag)
+    
+    def update_servers_display(self, changed=None):
+        """Atualiza a exibição dos servidores (todos ou só os nomes em `changed`)"""
+        view_changed = self.server_index.update(self.latest_results, changed)
+        if view_changed or changed is None or not changed.isdisjoint(self.row_names):
+            self.refresh_server_rows()
+    
+    def scroll_servers(self, rows):
+        """Rola a lista virtual `rows` linhas (negativo = para cima)"""
+        self.view_offset += rows
+        self.refresh_server_rows()
+        return 'break'
+    
+    def on_servers_scroll(self, action, amount, unit=None):
+        """Comando da scrollbar: 'moveto' fração ou 'scroll' N unidades/páginas"""
+        if action == 'moveto':
+            self.view_offset = int(float(amount) * len(self.server_index.view()))
+            self.refresh_server_rows()
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll_servers(int(amount) * step)
+    
+    def on_servers_wheel(self, event):
+        """Roda do mouse (Windows/macOS: delta; Linux: botões 4 e 5)"""
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            return self.scroll_servers(-3)
+        return self.scroll_servers(3)
+    
+    def on_servers_resize(self, event):
+        """Recalcula quantas linhas cabem na tabela"""
+        header = self.SERVERS_ROW_HEIGHT + 4
+        rows = max(1, (event.height - header) // self.SERVERS_ROW_HEIGHT)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh_server_rows()
+    
+    def on_server_select(self, event=None):
+        """Guarda o nome do servidor selecionado (os itens mudam de servidor ao rolar)"""
+        selection = self.servers_tree.selection()
+        if selection:
+            self.selected_server = self.servers_tree.set(selection[0], 'Nome')
+    
+    def on_servers_filter_change(self, *args):
+        """Aplica filtro e ordenação escolhidos e volta ao topo da lista"""
+        status_filter = next(key for key, label in self.STATUS_FILTER_LABELS.items()
+                             if label == self.status_filter_var.get())
+        sort_key = next(key for key, label in self.SORT_LABELS.items() if label == self.sort_var.get())
+        self.server_index.set_filter(status_filter, self.host_filter_var.get())
+        self.server_index.set_sort(sort_key)
+        self.view_offset = 0
+        self.refresh_server_rows()
+    
+    def telemetry_visible(self):
+        """Indica se a aba de telemetria é a aba exibida"""
+        return self.notebook.select() == str(self.telemetry_frame)
+    
+    def plot_telemetry_data(self, server_name, force=False):
+        """Plota os dados de telemetria"""
+        # Aba oculta: o desenho fica para quando ela for exibida
+        if not self.telemetry_visible():
+            return
         
-        # Gráfico 3: Status das portas
-        self.ax3.plot(timestamps, list(data['app_port_status']), 'r-', label='Porta App', linewidth=2)
-        self.ax3.plot(timestamps, list(data['admin_port_status']), 'orange', label='Porta Admin', linewidth=2)
-        self.ax3.set_title('Status das Portas')
-        self.ax3.set_ylabel('Status (0=Fechada, 1=Aberta)')
-        self.ax3.set_ylim(-0.1, 1.1)
-        self.ax3.legend()
-        self.ax3.grid(True, alpha=0.3)
+        if self.fig is None:
+            self.setup_telemetry()
         
-        # Gráfico 4: Uptime geral
-        uptime_data = list(data['overall_status'])
-        if len(uptime_data) > 0:
-            uptime_percentage = [sum(uptime_data[:i+1])/(i+1)*100 for i in range(len(uptime_data))]
-            self.ax4.plot(timestamps, uptime_percentage, 'purple', linewidth=2)
-        self.ax4.set_title('Disponibilidade Geral (%)')
-        self.ax4.set_ylabel('Uptime (%)')
-        self.ax4.set_ylim(0, 105)
-        self.ax4.grid(True, alpha=0.3)
+        # Nada mudou desde o último desenho
+        rendered = (server_name, self.telemetry.version(server_name))
+        if not force and rendered == self.telemetry_rendered:
+            return
         
-        # Formatar eixos X
-        for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
-            ax.tick_params(axis='x', rotation=45)
+        # Primeiro desenho deste servidor: limites e fundo refeitos do zero
+        if self.telemetry_rendered is None or self.telemetry_rendered[0] != server_name:
+            force = True
+        
+        data = self.telemetry.series(server_name)
+        if data is None or len(data['timestamps']) < 2:
+            if force and self.canvas is not None:
+                # Sem dados suficientes: não deixar na tela as linhas do servidor anterior
+                for line in self.telemetry_lines:
+                    line.set_data([], [])
+                self.canvas.draw()
+                self.telemetry_rendered = None
+            return
         
-        # Ajustar layout
-        self.fig.tight_layout()
+        # Epoch (s) -> datas do matplotlib; o eixo exibe no fuso local
+        timestamps = data['timestamps'] / 86400.0 + self.telemetry_epoch
+        self.ping_line.set_data(timestamps, data['ping_status'])
+        self.http_line.set_data(timestamps, data['http_response_times'])
+        self.app_port_line.set_data(timestamps, data['app_port_status'])
+        self.admin_port_line.set_data(timestamps, data['admin_port_status'])
+        self.uptime_line.set_data(timestamps, data['uptime_percentage'])
+        
+        # Os limites só mudam quando os dados saem da área visível; uma folga à
+        # direita evita redesenhar o fundo a cada amostra
+        full_redraw = force or self.canvas is None or self.telemetry_background is None
+        x_min, x_max = self.ax1.get_xlim()
+        if full_redraw or timestamps[0] < x_min or timestamps[-1] > x_max:
+            span = max(timestamps[-1] - timestamps[0], 1 / 86400)
+            for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
+                ax.set_xlim(timestamps[0], timestamps[-1] + span * 0.25)
+            full_redraw = True
+        
+        http_max = data['http_response_times'].max()
+        y_top = self.ax2.get_ylim()[1]
+        if http_max > y_top or (force and http_max > 0):
+            self.ax2.set_ylim(0, max(http_max * 1.2, 100))
+            full_redraw = True
         
         # Atualizar canvas
         if self.canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
             self.canvas = FigureCanvasTkAgg(self.fig, self.telemetry_canvas_frame)
             self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self.canvas.mpl_connect('draw_event', self.on_telemetry_draw)
+            self.canvas.mpl_connect('resize_event', self.on_telemetry_resize)
+            self.fig.tight_layout()
         
-        self.canvas.draw()
+        if full_redraw:
+            # O draw_event captura o novo fundo e desenha as linhas
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.telemetry_background)
+            self.draw_telemetry_lines()
+        self.telemetry_rendered = rendered
+    
+    def draw_telemetry_lines(self):
+        """Desenha só as linhas sobre o fundo e copia a figura para a tela"""
+        for line in self.telemetry_lines:
+            line.axes.draw_artist(line)
+        self.canvas.blit(self.fig.bbox)
+    
+    def on_telemetry_draw(self, event=None):
+        """Após um desenho completo, guarda o fundo para os próximos blits"""
+        self.telemetry_background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_telemetry_lines()
+    
+    def on_telemetry_resize(self, event=None):
+        """Ao redimensionar, recalcula o layout; o fundo é recapturado no próximo desenho"""
+        self.telemetry_background = None
+        self.fig.tight_layout()
+    
+    def on_tab_changed(self, event=None):
+        """Desenha a telemetria pendente quando a aba passa a ser exibida"""
+        selected_server = self.telemetry_server_var.get()
+        if selected_server and self.telemetry_visible():
+            self.plot_telemetry_data(selected_server)
+        if self.history_visible():
+            # Histórico só é lido com a aba aberta, e relido a cada exibição
+            self.refresh_history_servers()
+            self.load_history()
     
     def on_telemetry_server_change(self, event=None):
         """Callback quando servidor de telemetria é alterado"""
         selected_server = self.telemetry_server_var.get()
         if selected_server:
-            self.plot_telemetry_data(selected_server)
+            self.plot_telemetry_data(selected_server, force=True)
     
     def add_server_dialog(self):
         """Diálogo para adicionar servidor"""
@@ -470,16 +932,12 @@ class ServerMonitorGUI:
             messagebox.showwarning("Aviso", "Não há servidores para editar")
             return
         
-        # Verificar se há um servidor selecionado na treeview
-        selected_item = self.servers_tree.selection()
-        if not selected_item:
+        # Verificar se há um servidor selecionado na tabela
+        server_name = self.selected_server
+        if not server_name:
             messagebox.showinfo("Seleção Necessária", "Por favor, selecione um servidor na tabela para editar")
             return
         
-        # Obter dados do servidor selecionado
-        item_values = self.servers_tree.item(selected_item[0], 'values')
-        server_name = item_values[0]
-        
         # Encontrar o servidor na lista
         server_to_edit = None
         server_index = -1
@@ -507,16 +965,12 @@ class ServerMonitorGUI:
             messagebox.showwarning("Aviso", "Não há servidores para remover")
             return
         
-        # Verificar se há um servidor selecionado na treeview
-        selected_item = self.servers_tree.selection()
-        if not selected_item:
+        # Verificar se há um servidor selecionado na tabela
+        server_name = self.selected_server
+        if not server_name:
             messagebox.showinfo("Seleção Necessária", "Por favor, selecione um servidor na tabela para remover")
             return
         
-        # Obter dados do servidor selecionado
-        item_values = self.servers_tree.item(selected_item[0], 'values')
-        server_name = item_values[0]
-        
         # Confirmar remoção
         if messagebox.askyesno("Confirmar Remoção", f"Tem certeza que deseja remover o servidor '{server_name}'?"):
             # Encontrar e remover o servidor da lista
@@ -536,18 +990,23 @@ class ServerMonitorGUI:
     def save_servers_config(self):
         """Salva configuração dos servidores"""
         try:
-            with open('servers_config.json', 'w', encoding='utf-8') as f:
+            # Grava num arquivo temporário e troca de uma vez: a recarga nunca lê o arquivo pela metade
+            path = CONFIG['servers_config_file']
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
                 json.dump(self.servers, f, indent=2, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+            self.monitor.config_watcher.seed()  # Arquivo passa a ser a lista em uso (e observado)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar configuração: {e}")
     
     def load_servers_config(self):
         """Carrega configuração dos servidores"""
         try:
-            with open('servers_config.json', 'r', encoding='utf-8') as f:
+            with open(CONFIG['servers_config_file'], 'r', encoding='utf-8') as f:
                 loaded_servers = json.load(f)
                 if loaded_servers:  # Se há servidores no arquivo
                     self.servers = loaded_servers
+                    self.monitor.config_watcher.seed()
                     self.log_message(f"Carregados {len(self.servers)} servidores do arquivo de configuração")
                 else:
                     self.log_message("Arquivo de configuração vazio, usando servidores padrão")
@@ -572,7 +1031,8 @@ class ServerMonitorGUI:
     def on_closing(self):
         """Callback para fechamento da janela"""
         if self.monitoring_active:
-            self.stop_monitoring()
+            self.stop_monitoring(wait=True)  # Processo vai terminar: gravar o histórico pendente
+        self.monitor.remove_listener(self.telemetry.add_result)
         self.root.destroy()
 
 class ServerDialog:
@@ -582,7 +1042,7 @@ class ServerDialog:
         # Criar janela
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
-        self.dialog.geometry("450x400")
+        self.dialog.geometry("450x460")
         self.dialog.transient(parent)
         self.dialog.grab_set()
         self.dialog.resizable(False, False)
@@ -613,6 +1073,10 @@ class ServerDialog:
         self.health_url_entry = ttk.Entry(self.dialog, width=40)
         self.health_url_entry.pack(pady=5)
         
+        ttk.Label(self.dialog, text="Intervalo de Verificação em segundos (opcional):").pack(pady=5)
+        self.interval_entry = ttk.Entry(self.dialog, width=40)
+        self.interval_entry.pack(pady=5)
+        
         # Se dados do servidor foram fornecidos, pré-carregar os campos
         if server_data:
             self.name_entry.insert(0, server_data.get('name', ''))
@@ -627,6 +1091,7 @@ class ServerDialog:
             self.admin_port_entry.insert(0, str(server_data.get('admin_port', 4848)))
             
             self.health_url_entry.insert(0, server_data.get('health_url', ''))
+            self.interval_entry.insert(0, str(server_data.get('interval', '')))
         
         # Botões
         button_frame = ttk.Frame(self.dialog)
@@ -667,6 +1132,16 @@ class ServerDialog:
             messagebox.showerror("Erro", "Portas devem ser números")
             return
         
+        interval = self.interval_entry.get().strip()
+        if interval:
+            try:
+                interval = float(interval)
+                if interval <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Erro", "Intervalo deve ser um número positivo")
+                return
+        
         health_url = self.health_url_entry.get().strip()
         if not health_url:
             health_url = f"http://{host}:{app_port}/"
@@ -678,6 +1153,8 @@ class ServerDialog:
             'admin_port': admin_port,
             'health_url': health_url
         }
+        if interval:
+            self.result['interval'] = interval
         
         self.dialog.destroy()
     
@@ -691,7 +1168,7 @@ class ConfigDialog:
         # Criar janela
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Configurações")
-        self.dialog.geometry("500x400")
+        self.dialog.geometry("500x520")
         self.dialog.transient(parent)
         self.dialog.grab_set()
         
@@ -718,6 +1195,15 @@ class ConfigDialog:
         self.http_timeout_var = tk.StringVar(value=str(config['http_timeout']))
         ttk.Entry(general_frame, textvariable=self.http_timeout_var, width=20).pack(pady=5)
         
+        ttk.Label(general_frame, text="Máx. Verificações Simultâneas:").pack(pady=5)
+        self.max_probes_var = tk.StringVar(value=str(config['max_concurrent_probes']))
+        ttk.Entry(general_frame, textvariable=self.max_probes_var, width=20).pack(pady=5)
+        
+        ttk.Label(general_frame, text="Backend de Verificação (vale no próximo início):").pack(pady=5)
+        self.probe_backend_var = tk.StringVar(value=config['probe_backend'])
+        ttk.Combobox(general_frame, textvariable=self.probe_backend_var, values=('legacy', 'async'),
+                     state="readonly", width=17).pack(pady=5)
+        
         # Checkboxes
         self.sound_alerts_var = tk.BooleanVar(value=config['sound_alerts'])
         ttk.Checkbutton(general_frame, text="Alertas Sonoros", variable=self.sound_alerts_var).pack(pady=5)
@@ -757,6 +1243,8 @@ class ConfigDialog:
             self.config['monitor_interval'] = int(self.interval_var.get())
             self.config['ping_timeout'] = int(self.ping_timeout_var.get())
             self.config['http_timeout'] = int(self.http_timeout_var.get())
+            self.config['max_concurrent_probes'] = max(1, int(self.max_probes_var.get()))
+            self.config['probe_backend'] = self.probe_backend_var.get()
             self.config['sound_alerts'] = self.sound_alerts_var.get()
             self.config['email_alerts'] = self.email_alerts_var.get()
             self.config['smtp_server'] = self.smtp_server_var.get()
@@ -773,13 +1261,9 @@ def main():
     root = tk.Tk()
     app = ServerMonitorGUI(root)
     
-    # Configurar fechamento
+    # Configurar fechamento (os servidores já foram carregados no construtor)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     
-    # Carregar configuração de servidores
-    app.load_servers_config()
-    app.load_servers()
-    
     root.mainloop()
 
 if __name__ == '__main__':
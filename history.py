@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico do Monitorador de Servidores GlassFish
+Gravação em lote, numa thread de fundo, dos resultados das verificações,
+armazenamento tipado (SQLite) com consultas por período e servidor,
+agregados (1 min, 1 h, 1 dia) e retenção
+"""
+
+import csv
+import glob
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+CSV_HEADER = ['Timestamp', 'Server', 'Host', 'Ping', 'App_Port', 'Admin_Port', 'HTTP', 'Status']
+
+# Status gravados como inteiros no histórico SQLite
+STATUS_CODES = {'ONLINE': 0, 'ERRO_HTTP': 1, 'PORTAS_FECHADAS': 2, 'OFFLINE': 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Resoluções dos agregados, em segundos
+ROLLUP_RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+ROLLUP_CHECKS = ('status', 'ping', 'app_port', 'admin_port', 'http')
+
+
+def format_http_status(http_result):
+    """Resumo textual do resultado HTTP para o histórico"""
+    if not http_result:
+        return ''
+    if http_result['success']:
+        return f"{http_result['status_code']} ({http_result['response_time']:.2f}s)"
+    return http_result.get('error', f"Error {http_result['status_code']}")
+
+
+class CsvHistorySink:
+    """Destino CSV do histórico: um open/append por lote, não por linha
+
+    O arquivo é rotacionado (renomeado com data e hora) ao passar de
+    max_bytes ou de max_age_days; apenas os `backups` mais recentes são mantidos.
+    """
+
+    def __init__(self, path, max_bytes=0, max_age_days=0, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.backups = backups
+        self._ensure_file()
+
+    def _ensure_file(self):
+        if not os.path.exists(self.path):
+            with open(self.path, 'w', newline='', encoding='utf-8') as csvfile:
+                csv.writer(csvfile).writerow(CSV_HEADER)
+            self._created = time.time()
+        else:
+            self._created = self._first_row_time()
+
+    def _first_row_time(self):
+        """Horário do primeiro registro do arquivo (início do período coberto)"""
+        try:
+            with open(self.path, newline='', encoding='utf-8') as csvfile:
+                reader = csv.reader(csvfile)
+                next(reader)
+                return datetime.strptime(next(reader)[0], '%Y-%m-%d %H:%M:%S').timestamp()
+        except (OSError, StopIteration, IndexError, ValueError):
+            return time.time()
+
+    def _should_rotate(self):
+        if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+            return True
+        return bool(self.max_age_days) and time.time() - self._created >= self.max_age_days * 86400
+
+    def rotate(self):
+        """Renomeia o arquivo atual e descarta as cópias mais antigas"""
+        base, ext = os.path.splitext(self.path)
+        os.replace(self.path, f"{base}.{datetime.now():%Y%m%d-%H%M%S}{ext}")
+        # O carimbo de data no nome faz a ordem alfabética ser a cronológica
+        rotated = sorted(glob.glob(f"{glob.escape(base)}.*{ext}"))
+        for old_file in rotated[:max(0, len(rotated) - self.backups)]:
+            os.remove(old_file)
+        self._ensure_file()
+
+    def write_batch(self, results):
+        """Grava um lote de resultados"""
+        if self._should_rotate():
+            self.rotate()
+        with open(self.path, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerows([
+                result['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+                result['name'],
+                result['host'],
+                result['ping'],
+                result['app_port'],
+                result['admin_port'],
+                format_http_status(result['http']),
+                result['status']
+            ] for result in results)
+
+    def close(self):
+        """Nada a liberar: o arquivo só fica aberto durante cada lote"""
+
+
+def _latency_ms(check):
+    """Latência em ms de uma verificação bem-sucedida (None se falhou ou foi ignorada)"""
+    if check and check.get('success'):
+        return check.get('response_time')
+    return None
+
+
+class SqliteHistoryStore:
+    """Histórico tipado e indexado em SQLite (append-only)
+
+    Uma linha por verificação, com colunas numéricas: timestamp (epoch),
+    servidor, latências de ping/portas/HTTP em ms, código HTTP e status.
+    Os índices (servidor, timestamp) e (timestamp) permitem consultar um
+    período sem ler o arquivo inteiro.
+
+    maintain() consolida as amostras em agregados de 1 minuto, 1 hora e
+    1 dia (disponibilidade e latência mín/méd/p95/máx por verificação) e
+    apaga o que passou da retenção. Amostras brutas só são apagadas depois
+    de consolidadas, e consultas de períodos longos usam os agregados.
+    Os buckets são alinhados em UTC.
+
+    Amostras chegam atrasadas (o timestamp é o início da verificação e o
+    gravador junta lotes): só são consolidados buckets terminados há mais
+    de `settle_seconds`. Uma amostra que ainda assim cair num bucket já
+    consolidado faz a marca d'água recuar e o bucket é recalculado.
+    """
+
+    SCHEMA = """
+        PRAGMA auto_vacuum = INCREMENTAL;
+        CREATE TABLE IF NOT EXISTS servers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            host TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS samples (
+            ts REAL NOT NULL,
+            server_id INTEGER NOT NULL REFERENCES servers(id),
+            status INTEGER NOT NULL,
+            ping_ms REAL,
+            app_port_ms REAL,
+            admin_port_ms REAL,
+            http_status INTEGER,
+            http_ms REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_samples_server_ts ON samples (server_id, ts);
+        CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples (ts);
+        CREATE TABLE IF NOT EXISTS rollups (
+            resolution INTEGER NOT NULL,
+            server_id INTEGER NOT NULL REFERENCES servers(id),
+            check_type TEXT NOT NULL,
+            bucket REAL NOT NULL,
+            samples INTEGER NOT NULL,
+            up INTEGER NOT NULL,
+            min_ms REAL,
+            avg_ms REAL,
+            p95_ms REAL,
+            max_ms REAL,
+            PRIMARY KEY (resolution, server_id, check_type, bucket)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            resolution INTEGER PRIMARY KEY,
+            watermark REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, raw_retention_days=7, rollup_retention_days=None, settle_seconds=60):
+        self.path = path
+        self.settle_seconds = settle_seconds
+        # O agregado diário é calculado das amostras brutas: manter ao menos 2 dias
+        self.raw_retention_days = max(2, raw_retention_days)
+        self.rollup_retention_days = {'1m': 30, '1h': 365, '1d': 0}
+        self.rollup_retention_days.update(rollup_retention_days or {})
+        self._local = threading.local()
+        self._server_ids = {}
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        """Conexão da thread atual (o modo WAL permite ler enquanto a gravação ocorre)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _server_id(self, connection, name, host):
+        server_id = self._server_ids.get(name)
+        if server_id is None:
+            connection.execute('INSERT OR IGNORE INTO servers (name, host) VALUES (?, ?)', (name, host))
+            connection.execute('UPDATE servers SET host = ? WHERE name = ?', (host, name))
+            server_id = connection.execute('SELECT id FROM servers WHERE name = ?', (name,)).fetchone()[0]
+            self._server_ids[name] = server_id
+        return server_id
+
+    def write_batch(self, results):
+        """Grava um lote de resultados numa única transação"""
+        with self._lock:
+            connection = self._connection()
+            with connection:
+                rows = []
+                for result in results:
+                    http_result = result['http']
+                    rows.append((
+                        result['timestamp'].timestamp(),
+                        self._server_id(connection, result['name'], result['host']),
+                        STATUS_CODES.get(result['status'], STATUS_CODES['OFFLINE']),
+                        _latency_ms(result['ping']),
+                        _latency_ms(result['app_port']),
+                        _latency_ms(result['admin_port']),
+                        http_result['status_code'] if http_result else None,
+                        http_result['response_time'] * 1000 if http_result and http_result['success'] else None,
+                    ))
+                connection.executemany('INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                if rows:
+                    # Amostra atrasada num bucket já consolidado: recalcular a partir dele
+                    earliest = min(row[0] for row in rows)
+                    for resolution in ROLLUP_RESOLUTIONS.values():
+                        connection.execute('UPDATE rollup_state SET watermark = ? WHERE resolution = ? AND watermark > ?',
+                                           (earliest - earliest % resolution, resolution, earliest))
+
+    def server_names(self):
+        """Servidores que já têm histórico"""
+        return [row[0] for row in self._connection().execute('SELECT name FROM servers ORDER BY name')]
+
+    def query(self, server=None, start=None, end=None, limit=None):
+        """Itera as amostras de um período (datetime), opcionalmente de um servidor
+
+        As linhas são lidas do cursor sob demanda, sem carregar o período inteiro.
+        """
+        sql = ['SELECT s.ts, v.name, s.status, s.ping_ms, s.app_port_ms, s.admin_port_ms,'
+               ' s.http_status, s.http_ms FROM samples s JOIN servers v ON v.id = s.server_id WHERE 1=1']
+        params = []
+        if server is not None:
+            sql.append('AND s.server_id = (SELECT id FROM servers WHERE name = ?)')
+            params.append(server)
+        if start is not None:
+            sql.append('AND s.ts >= ?')
+            params.append(start.timestamp())
+        if end is not None:
+            sql.append('AND s.ts < ?')
+            params.append(end.timestamp())
+        sql.append('ORDER BY s.ts')
+        if limit is not None:
+            sql.append('LIMIT ?')
+            params.append(int(limit))
+
+        for ts, name, status, ping_ms, app_ms, admin_ms, http_status, http_ms in \
+                self._connection().execute(' '.join(sql), params):
+            yield {
+                'timestamp': datetime.fromtimestamp(ts),
+                'name': name,
+                'status': STATUS_NAMES.get(status, 'OFFLINE'),
+                'ping_ms': ping_ms,
+                'app_port_ms': app_ms,
+                'admin_port_ms': admin_ms,
+                'http_status': http_status,
+                'http_ms': http_ms,
+            }
+
+    def _rollup_level(self, connection, resolution, now):
+        """Consolida os buckets terminados há mais de settle_seconds desde a última execução"""
+        settled = now - self.settle_seconds
+        cutoff = settled - settled % resolution
+        row = connection.execute('SELECT watermark FROM rollup_state WHERE resolution = ?', (resolution,)).fetchone()
+        if row:
+            watermark = row[0]
+        else:
+            first_ts = connection.execute('SELECT MIN(ts) FROM samples').fetchone()[0]
+            if first_ts is None:
+                return
+            watermark = first_ts - first_ts % resolution
+        if cutoff <= watermark:
+            return
+
+        server_ids = [r[0] for r in connection.execute('SELECT id FROM servers')]
+        for server_id in server_ids:
+            # Um servidor por vez: a memória fica limitada às amostras de um servidor no período
+            buckets = {}
+            for ts, status, ping_ms, app_ms, admin_ms, http_status, http_ms in connection.execute(
+                    'SELECT ts, status, ping_ms, app_port_ms, admin_port_ms, http_status, http_ms FROM samples'
+                    ' WHERE server_id = ? AND ts >= ? AND ts < ?', (server_id, watermark, cutoff)):
+                checks = buckets.setdefault(ts - ts % resolution, {name: [0, 0, []] for name in ROLLUP_CHECKS})
+                for name, up, latency in (
+                        ('status', status == STATUS_CODES['ONLINE'], None),
+                        ('ping', ping_ms is not None, ping_ms),
+                        ('app_port', app_ms is not None, app_ms),
+                        ('admin_port', admin_ms is not None, admin_ms),
+                        ('http', http_status is not None and 200 <= http_status < 400, http_ms)):
+                    if name == 'http' and http_status is None:
+                        continue  # HTTP não verificado nesta amostra
+                    entry = checks[name]
+                    entry[0] += 1
+                    entry[1] += up
+                    if latency is not None:
+                        entry[2].append(latency)
+
+            rows = []
+            for bucket, checks in buckets.items():
+                for name, (samples, up, latencies) in checks.items():
+                    if not samples:
+                        continue
+                    if latencies:
+                        latencies.sort()
+                        p95 = latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+                        stats = (latencies[0], sum(latencies) / len(latencies), p95, latencies[-1])
+                    else:
+                        stats = (None, None, None, None)
+                    rows.append((resolution, server_id, name, bucket, samples, up) + stats)
+            connection.executemany('INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+        connection.execute('INSERT OR REPLACE INTO rollup_state VALUES (?, ?)', (resolution, cutoff))
+
+    def maintain(self, now=None):
+        """Atualiza os agregados e aplica a retenção das amostras e agregados"""
+        now = time.time() if now is None else now
+        with self._lock:
+            connection = self._connection()
+            with connection:
+                for resolution in ROLLUP_RESOLUTIONS.values():
+                    self._rollup_level(connection, resolution, now)
+
+                # Amostras brutas: só apagar o que já foi consolidado em todas as resoluções
+                raw_cutoff = now - self.raw_retention_days * 86400
+                watermark = connection.execute('SELECT MIN(watermark) FROM rollup_state').fetchone()[0]
+                if watermark is not None:
+                    connection.execute('DELETE FROM samples WHERE ts < ?', (min(raw_cutoff, watermark),))
+
+                for label, resolution in ROLLUP_RESOLUTIONS.items():
+                    days = self.rollup_retention_days.get(label, 0)
+                    if days:
+                        connection.execute('DELETE FROM rollups WHERE resolution = ? AND bucket < ?',
+                                           (resolution, now - days * 86400))
+            connection.execute('PRAGMA incremental_vacuum').fetchall()
+
+    def query_rollups(self, resolution, server=None, start=None, end=None, check_type=None):
+        """Itera os agregados de uma resolução (segundos) num período"""
+        sql = ['SELECT r.bucket, v.name, r.check_type, r.samples, r.up, r.min_ms, r.avg_ms, r.p95_ms, r.max_ms'
+               ' FROM rollups r JOIN servers v ON v.id = r.server_id WHERE r.resolution = ?']
+        params = [resolution]
+        if server is not None:
+            sql.append('AND r.server_id = (SELECT id FROM servers WHERE name = ?)')
+            params.append(server)
+        if check_type is not None:
+            sql.append('AND r.check_type = ?')
+            params.append(check_type)
+        if start is not None:
+            sql.append('AND r.bucket >= ?')
+            params.append(start.timestamp())
+        if end is not None:
+            sql.append('AND r.bucket < ?')
+            params.append(end.timestamp())
+        sql.append('ORDER BY r.bucket')
+
+        for bucket, name, check, samples, up, min_ms, avg_ms, p95_ms, max_ms in \
+                self._connection().execute(' '.join(sql), params):
+            yield {
+                'timestamp': datetime.fromtimestamp(bucket),
+                'name': name,
+                'check': check,
+                'samples': samples,
+                'availability': up * 100.0 / samples,
+                'min_ms': min_ms,
+                'avg_ms': avg_ms,
+                'p95_ms': p95_ms,
+                'max_ms': max_ms,
+            }
+
+    def first_timestamp(self, server=None):
+        """Início do histórico guardado (datetime), considerando amostras e agregados; None se vazio
+
+        Com `server`, cada MIN é uma busca no índice (servidor, tempo) das
+        amostras ou na chave primária dos agregados, sem varrer as tabelas.
+        """
+        connection = self._connection()
+        if server is None:
+            first = [connection.execute('SELECT MIN(ts) FROM samples').fetchone()[0],
+                     connection.execute('SELECT MIN(bucket) FROM rollups').fetchone()[0]]
+        else:
+            row = connection.execute('SELECT id FROM servers WHERE name = ?', (server,)).fetchone()
+            if row is None:
+                return None
+            first = [connection.execute('SELECT MIN(ts) FROM samples WHERE server_id = ?', row).fetchone()[0]]
+            for resolution in ROLLUP_RESOLUTIONS.values():
+                # Todo bucket tem a linha 'status': o MIN vira uma busca na chave primária
+                first.append(connection.execute(
+                    "SELECT MIN(bucket) FROM rollups WHERE resolution = ? AND server_id = ? AND check_type = 'status'",
+                    (resolution, row[0])).fetchone()[0])
+        first = [ts for ts in first if ts is not None]
+        return datetime.fromtimestamp(min(first)) if first else None
+
+    def choose_resolution(self, start, end, max_points=2000):
+        """Resolução adequada a um período: 0 (amostras brutas) ou segundos do agregado
+
+        O agregado mais grosso que ainda cabe em `max_points` fatias, pulando
+        os que já passaram da retenção no início do período.
+        """
+        start_ts, now = start.timestamp(), time.time()
+        slot_width = (end.timestamp() - start_ts) / max(1, int(max_points))
+        resolutions = sorted(ROLLUP_RESOLUTIONS.items(), key=lambda item: item[1])
+        resolution = 0
+        for _, seconds in resolutions:
+            if seconds <= slot_width:
+                resolution = seconds
+        if resolution == 0:
+            if start_ts >= now - self.raw_retention_days * 86400:
+                return 0
+            resolution = ROLLUP_RESOLUTIONS['1m']  # Amostras brutas já apagadas no início do período
+        for label, seconds in resolutions:
+            days = self.rollup_retention_days.get(label, 0)
+            if seconds >= resolution and (not days or start_ts >= now - days * 86400):
+                return seconds
+        return ROLLUP_RESOLUTIONS['1d']
+
+    def query_decimated(self, server, start, end, points=1000):
+        """Itera o período (datetime) de um servidor reduzido a no máximo `points` fatias de tempo
+
+        Cada fatia traz mín/máx da latência de ping e HTTP e a disponibilidade
+        (decimação mín/máx: picos não somem ao reduzir para a largura da tela).
+        A agregação é feita no SQLite sobre o índice (servidor, tempo); a
+        memória usada é proporcional a `points`, não ao período. Períodos
+        longos leem os agregados (1 min, 1 h, 1 dia) e o trecho ainda não
+        consolidado, as amostras brutas.
+        """
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        points = max(1, int(points))
+        slot_width = max((end_ts - start_ts) / points, 1e-3)
+        connection = self._connection()
+        row = connection.execute('SELECT id FROM servers WHERE name = ?', (server,)).fetchone()
+        if row is None or end_ts <= start_ts:
+            return
+        server_id = row[0]
+
+        # fatia -> [amostras, online, ping mín, ping máx, HTTP mín, HTTP máx]
+        slots = {}
+
+        def merge(slot, samples, up, ping_min, ping_max, http_min, http_max):
+            entry = slots.get(slot)
+            if entry is None:
+                slots[slot] = [samples, up, ping_min, ping_max, http_min, http_max]
+                return
+            entry[0] += samples
+            entry[1] += up
+            for index, value, pick in ((2, ping_min, min), (3, ping_max, max), (4, http_min, min), (5, http_max, max)):
+                if value is not None:
+                    entry[index] = value if entry[index] is None else pick(entry[index], value)
+
+        raw_from = start_ts
+        resolution = self.choose_resolution(start, end, points)
+        if resolution:
+            row = connection.execute('SELECT watermark FROM rollup_state WHERE resolution = ?',
+                                     (resolution,)).fetchone()
+            watermark = min(row[0], end_ts) if row else start_ts
+            raw_from = max(start_ts, watermark)
+            for slot, check, samples, up, min_ms, max_ms in connection.execute(
+                    'SELECT CAST((bucket - ?) / ? AS INTEGER) AS slot, check_type, SUM(samples), SUM(up),'
+                    ' MIN(min_ms), MAX(max_ms) FROM rollups'
+                    ' WHERE resolution = ? AND server_id = ? AND bucket >= ? AND bucket < ?'
+                    " AND check_type IN ('status', 'ping', 'http') GROUP BY slot, check_type",
+                    (start_ts, slot_width, resolution, server_id, start_ts, raw_from)):
+                if check == 'status':
+                    merge(slot, samples, up, None, None, None, None)
+                elif check == 'ping':
+                    merge(slot, 0, 0, min_ms, max_ms, None, None)
+                else:
+                    merge(slot, 0, 0, None, None, min_ms, max_ms)
+
+        # Trecho ainda não consolidado (ou período curto): amostras brutas
+        for row in connection.execute(
+                'SELECT CAST((ts - ?) / ? AS INTEGER) AS slot, COUNT(*), SUM(status = ?),'
+                ' MIN(ping_ms), MAX(ping_ms), MIN(http_ms), MAX(http_ms) FROM samples'
+                ' WHERE server_id = ? AND ts >= ? AND ts < ? GROUP BY slot',
+                (start_ts, slot_width, STATUS_CODES['ONLINE'], server_id, raw_from, end_ts)):
+            merge(*row)
+
+        for slot in sorted(slots):
+            samples, up, ping_min, ping_max, http_min, http_max = slots[slot]
+            yield {
+                'timestamp': datetime.fromtimestamp(start_ts + slot * slot_width),
+                'samples': samples,
+                'availability': up * 100.0 / samples if samples else None,
+                'ping_min_ms': ping_min,
+                'ping_max_ms': ping_max,
+                'http_min_ms': http_min,
+                'http_max_ms': http_max,
+                'resolution': resolution,
+            }
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class HistoryWriter:
+    """Fila limitada em memória esvaziada em lotes por uma thread de fundo
+
+    O lote é gravado quando atinge batch_size resultados ou a cada
+    flush_interval segundos. Com a fila cheia (disco lento), a política
+    decide o que fazer: 'drop_oldest' descarta o resultado mais antigo,
+    'drop_newest' descarta o novo e 'block' segura quem grava até haver
+    espaço (no máximo flush_interval segundos, depois descarta o novo).
+    """
+
+    POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, sinks, logger, max_queue=10000, batch_size=500, flush_interval=5.0,
+                 overflow_policy='drop_oldest', maintenance_interval=60):
+        if overflow_policy not in self.POLICIES:
+            raise ValueError(f"Política de descarte inválida: {overflow_policy}")
+        self.sinks = list(sinks)
+        self.logger = logger
+        self.max_queue = max(1, int(max_queue))
+        self.batch_size = max(1, min(int(batch_size), self.max_queue))
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.maintenance_interval = maintenance_interval
+        self._last_maintenance = time.time()
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue = deque()
+        self._writing = 0
+        self._stopping = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._closed:
+            return  # Parado: resultados ficam na fila até start()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+
+    def put(self, result):
+        """Enfileira um resultado para gravação"""
+        with self._cond:
+            self._ensure_thread()
+            if len(self._queue) >= self.max_queue:
+                # Parado, ninguém esvazia a fila: não esperar por espaço
+                if self.overflow_policy == 'block' and not self._closed:
+                    self._cond.wait_for(lambda: len(self._queue) < self.max_queue, timeout=self.flush_interval)
+                if len(self._queue) >= self.max_queue:
+                    self.dropped += 1
+                    if self.overflow_policy != 'drop_oldest':
+                        return
+                    self._queue.popleft()
+            self._queue.append(result)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._queue) >= self.batch_size,
+                    timeout=self.flush_interval)
+                batch = list(self._queue)
+                self._queue.clear()
+                self._writing += 1
+                stopping = self._stopping
+                # Liberar quem está bloqueado esperando espaço na fila
+                self._cond.notify_all()
+            try:
+                for sink in self.sinks:
+                    try:
+                        for start in range(0, len(batch), self.batch_size):
+                            sink.write_batch(batch[start:start + self.batch_size])
+                    except Exception as e:
+                        self.logger.error(f"Erro ao gravar histórico em {type(sink).__name__} "
+                                          f"({len(batch)} registros perdidos): {e}")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+            if self.dropped != self._reported_dropped:
+                self.logger.warning(f"Histórico: {self.dropped - self._reported_dropped} registros "
+                                    f"descartados (fila cheia, política '{self.overflow_policy}')")
+                self._reported_dropped = self.dropped
+            if time.time() - self._last_maintenance >= self.maintenance_interval:
+                self._maintain()
+            if stopping:
+                break
+        # Fechado pela própria thread: conexões SQLite são por thread
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                self.logger.error(f"Erro ao fechar histórico em {type(sink).__name__}: {e}")
+
+    def _maintain(self):
+        """Rotação, agregados e retenção dos destinos que suportam manutenção"""
+        self._last_maintenance = time.time()
+        for sink in self.sinks:
+            if hasattr(sink, 'maintain'):
+                try:
+                    sink.maintain()
+                except Exception as e:
+                    self.logger.error(f"Erro na manutenção do histórico em {type(sink).__name__}: {e}")
+
+    def start(self):
+        """Volta a gravar depois de stop(), inclusive o que chegou nesse meio tempo"""
+        with self._cond:
+            self._closed = False
+            if self._queue:
+                self._ensure_thread()
+
+    def stop(self, timeout=10):
+        """Grava o que restou na fila e encerra a thread de fundo
+
+        Espera no máximo `timeout` segundos (0 = não espera; a gravação
+        termina em segundo plano).
+        """
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout=timeout)
+        if timeout and thread.is_alive():
+            self.logger.warning("Histórico: gravação pendente não concluiu no tempo limite")
+
+    def queue_size(self):
+        """Quantidade de resultados aguardando gravação"""
+        return len(self._queue)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação do motor de verificação do Monitorador de Servidores GlassFish
+Duração dos ciclos, atraso do agendador, verificações em andamento e latência por tipo
+"""
+
+import threading
+
+# Verificações de um resultado e o fator para converter response_time em ms
+CHECK_TYPES = (('dns', 1.0), ('ping', 1.0), ('app_port', 1.0), ('admin_port', 1.0), ('http', 1000.0))
+
+
+class RunningStats:
+    """Contagem, média, mínimo e máximo em O(1) (modo básico)"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'last': self.last,
+        }
+
+
+class LatencyHistogram(RunningStats):
+    """Histograma log-linear de memória fixa (no estilo HDR)
+
+    Os valores são guardados em unidades de `resolution` e agrupados em
+    2**sub_bucket_bits faixas por potência de 2: erro relativo de no máximo
+    1/2**sub_bucket_bits nos percentis, com memória constante.
+    """
+
+    __slots__ = ('resolution', 'sub_bucket_bits', 'sub_buckets', 'counts')
+
+    def __init__(self, resolution=0.01, sub_bucket_bits=5, max_value=3600000):
+        super().__init__()
+        self.resolution = resolution
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.counts = [0] * (self._index(int(max_value / resolution)) + 1)
+
+    def _index(self, units):
+        if units < self.sub_buckets:
+            return units
+        shift = units.bit_length() - self.sub_bucket_bits - 1
+        return self.sub_buckets * (shift + 1) + (units >> shift) - self.sub_buckets
+
+    def _lower_bound(self, index):
+        if index < self.sub_buckets:
+            return index
+        shift = index // self.sub_buckets - 1
+        return (index % self.sub_buckets + self.sub_buckets) << shift
+
+    def record(self, value):
+        super().record(value)
+        index = self._index(max(0, int(value / self.resolution)))
+        self.counts[min(index, len(self.counts) - 1)] += 1
+
+    def percentile(self, percent):
+        """Valor aproximado do percentil (0-100); None sem amostras"""
+        if not self.count:
+            return None
+        target = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                value = self._lower_bound(index) * self.resolution
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        data = super().snapshot()
+        for percent in (50, 90, 99):
+            data[f'p{percent}'] = self.percentile(percent)
+        return data
+
+
+class ProbeStats:
+    """Instrumentação do ServerMonitor
+
+    mode 'basic' (padrão, sempre ligado): contagem, média, mínimo e máximo em
+    O(1) por amostra. mode 'full': histogramas de memória fixa com percentis.
+    mode 'off': nada é registrado.
+    """
+
+    def __init__(self, mode='basic'):
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _stats(self):
+        return LatencyHistogram() if self.mode == 'full' else RunningStats()
+
+    def reset(self):
+        """Zera todas as medidas"""
+        with self._lock:
+            self.cycle = self._stats()  # Duração dos ciclos completos (s)
+            self.lag = self._stats()  # Atraso entre o horário agendado e o despacho (s)
+            self.probe = self._stats()  # Duração da verificação de um servidor (s)
+            self.checks = {check: self._stats() for check, _ in CHECK_TYPES}  # Latência por tipo (ms)
+            self.check_failures = {check: 0 for check, _ in CHECK_TYPES}
+            self.overruns = 0
+            self.probe_errors = 0
+            self.max_in_flight = 0
+
+    def record_dispatch(self, lags, in_flight, interval):
+        """Servidores despachados: atraso de cada um e verificações em andamento
+
+        Um atraso maior que `interval` (o intervalo de monitoramento) conta
+        como estouro: o motor não deu conta e a verificação perdeu um intervalo inteiro.
+        """
+        if self.mode == 'off':
+            return
+        with self._lock:
+            for lag in lags:
+                self.lag.record(lag)
+                if lag > interval:
+                    self.overruns += 1
+            self.max_in_flight = max(self.max_in_flight, in_flight)
+
+    def record_probe(self, duration, failed=False):
+        """Fim da verificação de um servidor"""
+        if self.mode == 'off':
+            return
+        with self._lock:
+            self.probe.record(duration)
+            if failed:
+                self.probe_errors += 1
+
+    def record_cycle(self, duration):
+        """Fim de um ciclo (todos os servidores verificados ao menos uma vez)"""
+        if self.mode == 'off':
+            return
+        with self._lock:
+            self.cycle.record(duration)
+
+    def record_result(self, result):
+        """Latência de cada tipo de verificação de um resultado"""
+        if self.mode == 'off':
+            return
+        with self._lock:
+            for check, scale in CHECK_TYPES:
+                check_result = result.get(check)
+                if not check_result or check_result.get('status') == 'IGNORADO':
+                    continue
+                if check_result.get('success'):
+                    self.checks[check].record(check_result.get('response_time', 0) * scale)
+                else:
+                    self.check_failures[check] += 1
+
+    def snapshot(self):
+        """Cópia das medidas atuais em um dicionário"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'cycle_seconds': self.cycle.snapshot(),
+                'scheduler_lag_seconds': self.lag.snapshot(),
+                'overruns': self.overruns,
+                'probe_seconds': self.probe.snapshot(),
+                'probe_errors': self.probe_errors,
+                'max_in_flight': self.max_in_flight,
+                'checks_ms': {check: stats.snapshot() for check, stats in self.checks.items()},
+                'check_failures': dict(self.check_failures),
+            }
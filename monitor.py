@@ -5,7 +5,6 @@ Monitorador de Servidores GlassFish
 Sistema completo de monitoramento com interface gráfica
 """
 
-import os
 import sys
 import time
 import socket
@@ -13,30 +12,87 @@ import platform
 import subprocess
 import threading
 import logging
-import csv
-import smtplib
-from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import requests
-from requests.exceptions import RequestException, Timeout, ConnectionError
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from urllib.parse import urlsplit, urlunsplit
+from history import CsvHistorySink, HistoryWriter, SqliteHistoryStore
+from scheduler import ProbeScheduler
+from instrumentation import ProbeStats
+from alerts import AlertDispatcher, AlertStateMachine
+from dns_cache import DnsCache
+from status_board import StatusBoard
+from results import CheckResult, ProbeResult, Status
+from server_config import ServerConfigWatcher, diff_servers
 
 # Configurações globais
 CONFIG = {
     'ping_timeout': 3,
+    'port_timeout': 5,
     'http_timeout': 10,
-    'monitor_interval': 30,
+    'http_method': 'GET',  # 'GET', 'HEAD' ou 'CONDITIONAL' (GET com If-None-Match/If-Modified-Since; só no backend legacy, o async faz GET)
+    'http_max_bytes': 0,  # Ler no máximo N bytes do corpo da resposta (0 = corpo inteiro; backend legacy, o async não lê o corpo)
+    'http_drain_bytes': 65536,  # Com http_max_bytes: corpo restante até N bytes é lido para a conexão voltar ao pool
+    'http_pool_size': 4,  # Conexões keep-alive mantidas por host (backend legacy; o async abre uma conexão por verificação)
+    'http_pool_idle_timeout': 300,  # Segundos sem uso antes de descartar a sessão de um host (backend legacy)
+    'monitor_interval': 30,  # Intervalo padrão; cada servidor pode ter o seu ('interval' no cadastro)
+    'schedule_jitter': 0.1,  # Variação aleatória (±10%) do intervalo, evita rajadas sincronizadas
+    'state_change_recheck': 5,  # Segundos até verificar de novo um servidor que mudou de status
+    'down_backoff_after': 3,  # Verificações fora do ar antes de começar o recuo exponencial
+    'max_backoff_interval': 600,  # Intervalo máximo (s) para servidores fora do ar há muito tempo
+    'max_concurrent_probes': 20,  # Máximo de servidores verificados em paralelo
+    'parallel_checks': True,  # Portas (e HTTP sem condição) de um servidor verificados em paralelo
+    'parallel_ping': False,  # Ping junto com as portas; False = portas só após resposta ao ping
+    'gate_http_on_app_port': True,  # HTTP só é verificado se a porta da aplicação estiver aberta
+    'check_deadline': 20,  # Prazo total (s) das verificações de um servidor (0 = sem prazo)
+    'dns_cache': True,  # Reaproveitar a resolução DNS entre verificações
+    'dns_ttl': 300,  # Segundos de validade de um nome resolvido
+    'dns_negative_ttl': 30,  # Segundos até consultar de novo um nome que não resolveu
+    'dns_refresh_ahead': 0.8,  # Fração do TTL após a qual o nome é renovado em segundo plano
+    'probe_backend': 'legacy',  # 'legacy' (threads + ping externo) ou 'async' (asyncio)
+    'icmp_ping': True,  # Backend async: usar ICMP echo nativo em vez do comando ping
+    'servers_config_file': 'servers_config.json',  # Lista de servidores (interface, daemon e recarga)
+    'config_reload_interval': 2,  # Segundos entre verificações de mudança na lista de servidores (0 = não recarregar)
+    'daemon_workers': 4,  # Processos de verificação no modo daemon (monitor_daemon.py)
+    'daemon_restart_delay': 5,  # Segundos antes de reiniciar um worker que terminou
+    'daemon_shutdown_timeout': 15,  # Segundos de espera pela parada dos workers
+    'status_publish_interval': 0.25,  # Segundos entre publicações do quadro de status (resultados agrupados)
+    'instrumentation': 'basic',  # 'basic' (contadores O(1)), 'full' (histogramas com percentis) ou 'off'
+    'status_api': False,  # Servir /status (JSON) e /metrics (Prometheus) por HTTP
+    'status_api_host': '127.0.0.1',  # Endereço da API de status (0.0.0.0 = todas as interfaces)
+    'status_api_port': 8765,  # Porta da API de status
+    'status_api_refresh': 1,  # Intervalo mínimo (s) entre serializações do status
     'log_file': 'monitor.log',
     'csv_file': 'monitor_history.csv',
+    'history_db_file': 'monitor_history.db',
+    'history_backends': ['sqlite', 'csv'],  # Destinos do histórico: 'sqlite' (tipado, indexado) e/ou 'csv'
+    'history_batch_size': 500,  # Registros por gravação em lote no histórico
+    'history_flush_interval': 5,  # Segundos máximos entre gravações do histórico
+    'history_queue_size': 10000,  # Limite de registros pendentes em memória
+    'history_overflow_policy': 'drop_oldest',  # 'drop_oldest', 'drop_newest' ou 'block'
+    'history_maintenance_interval': 60,  # Segundos entre consolidações/retenção do histórico
+    'history_raw_retention_days': 7,  # Amostras brutas (SQLite); depois disso só os agregados
+    'history_rollup_retention_days': {'1m': 30, '1h': 365, '1d': 0},  # 0 = manter para sempre
+    'history_csv_max_bytes': 50 * 1024 * 1024,  # Rotacionar o CSV ao atingir este tamanho (0 = nunca)
+    'history_csv_max_age_days': 30,  # Rotacionar o CSV após N dias (0 = nunca)
+    'history_csv_backups': 5,  # Arquivos CSV rotacionados mantidos
     'email_alerts': False,
     'sound_alerts': True,
     'smtp_server': 'smtp.gmail.com',
     'smtp_port': 587,
     'email_user': '',
     'email_password': '',
-    'alert_recipients': []
+    'alert_recipients': [],
+    'alert_confirm_count': 2,  # N: observações no novo estado, entre as últimas M, para confirmar a mudança
+    'alert_confirm_window': 3,  # M: observações consideradas na confirmação
+    'flap_window': 10,  # Observações consideradas na detecção de oscilação
+    'flap_start_changes': 5,  # Mudanças na janela para marcar o servidor como instável (0 = desativado)
+    'flap_stop_changes': 2,  # Mudanças na janela para voltar a estável
+    'alert_min_interval': 60,  # Segundos mínimos entre alertas do mesmo servidor
+    'alert_digest_window': 10,  # Segundos agrupando alertas em um único email (resumo)
+    'alert_retry_attempts': 5,  # Tentativas de envio de cada email
+    'alert_retry_backoff': 5,  # Espera (s) antes da 2ª tentativa; dobra a cada nova falha
+    'smtp_timeout': 30,  # Tempo limite (s) das operações SMTP
+    'smtp_idle_timeout': 60,  # Fecha a conexão SMTP após N segundos sem alertas
+    'alert_shutdown_timeout': 30,  # Espera (s) pelo envio dos alertas pendentes ao parar (console, daemon, fechar a janela)
 }
 
 # Lista de servidores para monitorar
@@ -57,14 +113,178 @@ SERVERS = [
     }
 ]
 
+def build_ping_command(host, timeout):
+    """Monta o comando ping da plataforma atual"""
+    if platform.system().lower() == 'windows':
+        return ['ping', '-n', '1', '-w', str(timeout * 1000), host]
+    return ['ping', '-c', '1', '-W', str(timeout), host]
+
+def parse_ping_time(output, default):
+    """Extrai o tempo de resposta (ms) da saída do comando ping"""
+    output = output.lower()
+    if 'time=' in output:
+        try:
+            return float(output.split('time=')[1].split('ms')[0])
+        except ValueError:
+            pass  # usar o tempo calculado
+    return default
+
+def skipped_port_result(port):
+    """Resultado de porta não verificada (host sem resposta ao ping)"""
+    return CheckResult(success=False, port=port, status='IGNORADO')
+
+def deadline_exceeded_result(check, port=None):
+    """Resultado de uma verificação interrompida pelo prazo do servidor"""
+    if check == 'port':
+        return CheckResult(success=False, port=port, response_time=0, status='ERRO', error='Prazo esgotado')
+    if check == 'http':
+        return CheckResult(success=False, status_code=0, response_time=0, error='Prazo esgotado')
+    return CheckResult(success=False, response_time=0, error='Prazo esgotado')
+
+def dns_failure_checks(server, dns_result):
+    """Verificações de um servidor cujo nome não resolveu: OFFLINE sem tentar conectar"""
+    ping_result = CheckResult(success=False, response_time=0, error=dns_result.error or 'Falha na resolução DNS')
+    return ping_result, skipped_port_result(server['app_port']), skipped_port_result(server['admin_port']), None
+
+def resolved_http_url(url, address):
+    """URL apontando para o endereço já resolvido e o cabeçalho Host original
+    
+    Só para http: com https o nome fica na URL, pois o certificado e o SNI dependem dele.
+    """
+    try:
+        parts = urlsplit(url)
+        if not address or parts.scheme != 'http' or not parts.hostname or parts.hostname == address:
+            return url, None
+        netloc = address if parts.port is None else f"{address}:{parts.port}"
+    except ValueError:
+        return url, None
+    return urlunsplit(parts._replace(netloc=netloc)), parts.netloc
+
+class HttpSessionPool:
+    """Sessões HTTP persistentes (keep-alive) por host, descartadas após ficarem ociosas"""
+    
+    def __init__(self):
+        self._sessions = {}  # (esquema, host:porta) -> [sessão, último uso]
+        self._validators = {}  # url -> cabeçalhos para GET condicional
+        self._lock = threading.Lock()
+    
+    def _create_session(self):
+        # requests só é carregado na primeira verificação HTTP (o backend async nem usa)
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(CONFIG['http_pool_size'])))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def get(self, url):
+        """Retorna a sessão do host da URL, criando-a se necessário"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = self._sessions[key] = [self._create_session(), now]
+            entry[1] = now
+            return entry[0]
+    
+    def _evict_idle(self, now):
+        idle_timeout = CONFIG['http_pool_idle_timeout']
+        for key, (session, last_used) in list(self._sessions.items()):
+            if now - last_used > idle_timeout:
+                del self._sessions[key]
+                session.close()
+    
+    def conditional_headers(self, url):
+        """Cabeçalhos If-None-Match/If-Modified-Since da última resposta desta URL"""
+        return dict(self._validators.get(url, {}))
+    
+    def remember_validators(self, url, response):
+        """Guarda ETag/Last-Modified para a próxima verificação condicional"""
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = response.headers['Last-Modified']
+        if validators:
+            self._validators[url] = validators
+    
+    def close_all(self):
+        """Fecha todas as sessões abertas"""
+        with self._lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+class ThreadedProbeBackend:
+    """Backend legado: cada servidor é verificado numa thread do pool"""
+    
+    def __init__(self, monitor):
+        self.monitor = monitor
+        max_workers = max(1, int(CONFIG['max_concurrent_probes']))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='probe')
+    
+    def submit(self, server):
+        """Agenda a verificação de um servidor; retorna um concurrent.futures.Future"""
+        return self.executor.submit(self.monitor.monitor_server, server)
+    
+    def close(self):
+        """Libera o pool de threads, descartando verificações ainda não iniciadas"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
 class ServerMonitor:
     def __init__(self):
         self.setup_logging()
         self.monitoring = False
         self.monitor_thread = None
-        self.server_status = {}
+        self.status_board = StatusBoard()
         self.servers = SERVERS.copy()  # Lista de servidores para monitorar
+        self._listeners = []
+        self._listeners_lock = threading.Lock()
+        self.scheduler = ProbeScheduler()
+        self._scheduled_servers = None
+        self._wakeup = threading.Event()
+        self.http_pool = HttpSessionPool()
+        self._check_executor = None
+        self.status_api = None
+        self.stats = ProbeStats(CONFIG['instrumentation'])
+        self.alerts = AlertDispatcher(CONFIG, self.logger)
+        self.alert_state = AlertStateMachine(CONFIG)
+        self.dns = DnsCache(CONFIG, self.logger)
+        self.config_watcher = ServerConfigWatcher(CONFIG, self.logger)
+        self.history_store = None
+        sinks = []
+        if 'sqlite' in CONFIG['history_backends']:
+            self.history_store = SqliteHistoryStore(
+                CONFIG['history_db_file'],
+                raw_retention_days=CONFIG['history_raw_retention_days'],
+                rollup_retention_days=CONFIG['history_rollup_retention_days'],
+                # Atraso máximo de uma amostra: duração da verificação + espera do lote
+                settle_seconds=(CONFIG['check_deadline'] or CONFIG['ping_timeout'] + 2 * CONFIG['port_timeout']
+                                + CONFIG['http_timeout']) + CONFIG['history_flush_interval'] + 10)
+            sinks.append(self.history_store)
+        if 'csv' in CONFIG['history_backends']:
+            sinks.append(CsvHistorySink(
+                CONFIG['csv_file'],
+                max_bytes=CONFIG['history_csv_max_bytes'],
+                max_age_days=CONFIG['history_csv_max_age_days'],
+                backups=CONFIG['history_csv_backups']))
+        self.history = HistoryWriter(
+            sinks, self.logger,
+            max_queue=CONFIG['history_queue_size'],
+            batch_size=CONFIG['history_batch_size'],
+            flush_interval=CONFIG['history_flush_interval'],
+            overflow_policy=CONFIG['history_overflow_policy'],
+            maintenance_interval=CONFIG['history_maintenance_interval'])
         
+    @property
+    def server_status(self):
+        """Último resultado de cada servidor: snapshot imutável, lido sem lock (ver StatusBoard)"""
+        return self.status_board.snapshot
+    
     def setup_logging(self):
         """Configura o sistema de logs"""
         logging.basicConfig(
@@ -76,20 +296,11 @@ class ServerMonitor:
             ]
         )
         self.logger = logging.getLogger(__name__)
-        
-        # Criar arquivo CSV se não existir
-        if not os.path.exists(CONFIG['csv_file']):
-            with open(CONFIG['csv_file'], 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Timestamp', 'Server', 'Host', 'Ping', 'App_Port', 'Admin_Port', 'HTTP', 'Status'])
     
     def check_ping(self, host):
         """Verifica se o host responde ao ping e retorna tempo de resposta"""
         try:
-            if platform.system().lower() == 'windows':
-                cmd = ['ping', '-n', '1', '-w', str(CONFIG['ping_timeout'] * 1000), host]
-            else:
-                cmd = ['ping', '-c', '1', '-W', str(CONFIG['ping_timeout']), host]
+            cmd = build_ping_command(host, CONFIG['ping_timeout'])
             
             start_time = time.time()
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=CONFIG['ping_timeout'] + 2)
@@ -97,82 +308,75 @@ class ServerMonitor:
             
             if result.returncode == 0:
                 # Tentar extrair tempo real do ping do output
-                output = result.stdout.lower()
-                if 'time=' in output:
-                    try:
-                        time_part = output.split('time=')[1].split('ms')[0]
-                        response_time = float(time_part)
-                    except:
-                        pass  # usar o tempo calculado
+                response_time = parse_ping_time(result.stdout, response_time)
                 
-                return {
-                    'success': True,
-                    'response_time': round(response_time, 1)
-                }
+                return CheckResult(success=True, response_time=round(response_time, 1))
             else:
-                return {
-                    'success': False,
-                    'response_time': 0,
-                    'error': 'Sem resposta'
-                }
+                return CheckResult(success=False, response_time=0, error='Sem resposta')
         except (subprocess.TimeoutExpired, Exception) as e:
             self.logger.error(f"Erro no ping para {host}: {e}")
-            return {
-                'success': False,
-                'response_time': 0,
-                'error': str(e)
-            }
+            return CheckResult(success=False, response_time=0, error=str(e))
     
     def check_port(self, host, port):
         """Verifica se uma porta específica está aberta e retorna detalhes"""
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
+            sock.settimeout(CONFIG['port_timeout'])
             start_time = time.time()
             result = sock.connect_ex((host, port))
             response_time = (time.time() - start_time) * 1000  # em ms
             sock.close()
             
             if result == 0:
-                return {
-                    'success': True,
-                    'port': port,
-                    'response_time': round(response_time, 1),
-                    'status': 'ABERTA'
-                }
+                return CheckResult(success=True, port=port, response_time=round(response_time, 1), status='ABERTA')
             else:
-                return {
-                    'success': False,
-                    'port': port,
-                    'response_time': 0,
-                    'status': 'FECHADA',
-                    'error': f'Falha na conexão (código: {result})'
-                }
+                return CheckResult(success=False, port=port, response_time=0, status='FECHADA',
+                                   error=f'Falha na conexão (código: {result})')
         except Exception as e:
             self.logger.error(f"Erro ao verificar porta {port} em {host}: {e}")
-            return {
-                'success': False,
-                'port': port,
-                'response_time': 0,
-                'status': 'ERRO',
-                'error': str(e)
-            }
-    
-    def check_http(self, url):
-        """Verifica resposta HTTP de uma URL"""
+            return CheckResult(success=False, port=port, response_time=0, status='ERRO', error=str(e))
+    
+    def check_http(self, url, address=None):
+        """Verifica resposta HTTP de uma URL (conectando em `address`, se já resolvido)"""
+        from requests.exceptions import RequestException, Timeout, ConnectionError
         try:
-            response = requests.get(url, timeout=CONFIG['http_timeout'])
-            return {
-                'status_code': response.status_code,
-                'success': 200 <= response.status_code < 400,
-                'response_time': response.elapsed.total_seconds()
-            }
+            method = CONFIG['http_method'].upper()
+            headers = {}
+            if method == 'CONDITIONAL':
+                method = 'GET'
+                headers = self.http_pool.conditional_headers(url)
+            max_bytes = CONFIG['http_max_bytes'] if method == 'GET' else 0
+            
+            target_url, host_header = resolved_http_url(url, address)
+            if host_header:
+                headers['Host'] = host_header
+            session = self.http_pool.get(target_url)
+            response = session.request(method, target_url, headers=headers, timeout=CONFIG['http_timeout'],
+                                       stream=max_bytes > 0)
+            try:
+                if max_bytes > 0:
+                    chunks = response.iter_content(chunk_size=max_bytes)
+                    next(chunks, None)
+                    # Resto pequeno: terminar de ler devolve a conexão ao pool (keep-alive). Corpo
+                    # maior que http_drain_bytes: a conexão é fechada em vez de baixar a página inteira
+                    drained = 0
+                    for chunk in chunks:
+                        drained += len(chunk)
+                        if drained >= CONFIG['http_drain_bytes']:
+                            break
+                if CONFIG['http_method'].upper() == 'CONDITIONAL' and response.status_code == 200:
+                    self.http_pool.remember_validators(url, response)
+            finally:
+                response.close()
+            
+            return CheckResult(success=200 <= response.status_code < 400, status_code=response.status_code,
+                               response_time=response.elapsed.total_seconds())
         except Timeout:
-            return {'status_code': 0, 'success': False, 'response_time': CONFIG['http_timeout'], 'error': 'Timeout'}
+            return CheckResult(success=False, status_code=0, response_time=CONFIG['http_timeout'], error='Timeout')
         except ConnectionError:
-            return {'status_code': 0, 'success': False, 'response_time': 0, 'error': 'Erro de Conexão'}
+            return CheckResult(success=False, status_code=0, response_time=0, error='Erro de Conexão')
         except RequestException as e:
-            return {'status_code': 0, 'success': False, 'response_time': 0, 'error': str(e)}
+            return CheckResult(success=False, status_code=0, response_time=0, error=str(e))
     
     def log_status(self, message):
         """Registra status nos logs"""
@@ -189,83 +393,124 @@ class ServerMonitor:
                 print('\a')  # Bell character
     
     def send_email_alert(self, subject, message):
-        """Envia alerta por email"""
-        if not CONFIG['email_alerts'] or not CONFIG['email_user']:
-            return
+        """Enfileira alerta por email (enviado em segundo plano, agrupado em resumo)"""
+        self.alerts.put(subject, message)
+    
+    def check_pool(self):
+        """Pool de threads das verificações individuais (ping, portas, HTTP)"""
+        if self._check_executor is None:
+            max_workers = max(1, int(CONFIG['max_concurrent_probes'])) * 4
+            self._check_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='check')
+        return self._check_executor
+    
+    def run_checks(self, server, address=None):
+        """Executa as verificações de um servidor, em paralelo e com prazo total
         
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = CONFIG['email_user']
-            msg['To'] = ', '.join(CONFIG['alert_recipients'])
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(message, 'plain', 'utf-8'))
-            
-            server = smtplib.SMTP(CONFIG['smtp_server'], CONFIG['smtp_port'])
-            server.starttls()
-            server.login(CONFIG['email_user'], CONFIG['email_password'])
-            
-            for recipient in CONFIG['alert_recipients']:
-                server.sendmail(CONFIG['email_user'], recipient, msg.as_string())
-            
-            server.quit()
-            self.logger.info(f"Email de alerta enviado: {subject}")
-        except Exception as e:
-            self.logger.error(f"Erro ao enviar email: {e}")
+        Portas (e ping, com parallel_ping) rodam ao mesmo tempo. As dependências
+        continuam configuráveis: sem parallel_ping as portas só são verificadas
+        se o host responder ao ping, e com gate_http_on_app_port o HTTP só roda
+        com a porta da aplicação aberta. O que passar de check_deadline é
+        registrado como 'Prazo esgotado'. Com `address` (já resolvido) nenhuma
+        verificação consulta o DNS.
+        """
+        if not CONFIG['parallel_checks']:
+            return self.run_checks_sequential(server, address)
+        
+        host = address or server['host']
+        health_url = server.get('health_url')
+        pool = self.check_pool()
+        deadline = time.monotonic() + CONFIG['check_deadline'] if CONFIG['check_deadline'] else None
+        
+        def wait(future, check, port=None):
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                return future.result(timeout=timeout)
+            except FuturesTimeout:
+                future.cancel()
+                return deadline_exceeded_result(check, port)
+        
+        ping_future = pool.submit(self.check_ping, host)
+        if not CONFIG['parallel_ping']:
+            ping_result = wait(ping_future, 'ping')
+            if not ping_result.success:
+                return ping_result, skipped_port_result(server['app_port']), skipped_port_result(server['admin_port']), None
+        
+        app_port_future = pool.submit(self.check_port, host, server['app_port'])
+        admin_port_future = pool.submit(self.check_port, host, server['admin_port'])
+        http_future = None
+        if health_url and not CONFIG['gate_http_on_app_port']:
+            http_future = pool.submit(self.check_http, health_url, address)
+        
+        if CONFIG['parallel_ping']:
+            ping_result = wait(ping_future, 'ping')
+        app_port_result = wait(app_port_future, 'port', server['app_port'])
+        if http_future is None and health_url and ping_result.success and app_port_result.success:
+            http_future = pool.submit(self.check_http, health_url, address)
+        admin_port_result = wait(admin_port_future, 'port', server['admin_port'])
+        http_result = wait(http_future, 'http') if http_future else None
+        
+        return ping_result, app_port_result, admin_port_result, http_result
     
-    def monitor_server(self, server):
-        """Monitora um servidor específico"""
-        timestamp = datetime.now()
-        name = server['name']
-        host = server['host']
+    def run_checks_sequential(self, server, address=None):
+        """Executa as verificações de ping, portas e HTTP uma após a outra"""
+        host = address or server['host']
         
-        # Verificações
         ping_result = self.check_ping(host)
-        app_port_result = self.check_port(host, server['app_port']) if ping_result['success'] else {'success': False, 'port': server['app_port'], 'status': 'IGNORADO'}
-        admin_port_result = self.check_port(host, server['admin_port']) if ping_result['success'] else {'success': False, 'port': server['admin_port'], 'status': 'IGNORADO'}
+        app_port_result = self.check_port(host, server['app_port']) if ping_result.success else skipped_port_result(server['app_port'])
+        admin_port_result = self.check_port(host, server['admin_port']) if ping_result.success else skipped_port_result(server['admin_port'])
         
         http_result = None
-        if ping_result['success'] and app_port_result['success'] and 'health_url' in server:
-            http_result = self.check_http(server['health_url'])
+        if ping_result.success and app_port_result.success and 'health_url' in server:
+            http_result = self.check_http(server['health_url'], address)
+        
+        return ping_result, app_port_result, admin_port_result, http_result
+    
+    def resolve_server(self, server):
+        """Resolve o host do servidor pelo cache DNS ('ip' no cadastro fixa o endereço)"""
+        return self.dns.resolve(server['host'], server.get('ip'))
+    
+    def monitor_server(self, server):
+        """Monitora um servidor específico"""
+        timestamp = time.time()
+        dns_result = self.resolve_server(server)
+        if dns_result.success:
+            checks = self.run_checks(server, dns_result.address)
+        else:
+            checks = dns_failure_checks(server, dns_result)
+        return self.process_result(server, timestamp, *checks, dns_result=dns_result)
+    
+    def process_result(self, server, timestamp, ping_result, app_port_result, admin_port_result, http_result,
+                       dns_result=None):
+        """Consolida as verificações (timestamp = epoch da verificação): status geral, log, CSV e alertas"""
+        name = server['name']
+        host = server['host']
         
         # Determinar status geral
-        if not ping_result['success']:
-            status = 'OFFLINE'
-            status_icon = '❌'
-        elif not app_port_result['success'] and not admin_port_result['success']:
-            status = 'PORTAS_FECHADAS'
-            status_icon = '⚠️'
-        elif http_result and not http_result['success']:
-            status = 'ERRO_HTTP'
-            status_icon = '⚠️'
+        if not ping_result.success:
+            status = Status.OFFLINE
+        elif not app_port_result.success and not admin_port_result.success:
+            status = Status.PORTAS_FECHADAS
+        elif http_result and not http_result.success:
+            status = Status.ERRO_HTTP
         else:
-            status = 'ONLINE'
-            status_icon = '✅'
+            status = Status.ONLINE
+        status_icon = status.icon
         
-        # Criar resultado
-        result = {
-            'timestamp': timestamp,
-            'name': name,
-            'host': host,
-            'ping': ping_result,
-            'app_port': app_port_result,
-            'admin_port': admin_port_result,
-            'http': http_result,
-            'status': status,
-            'status_icon': status_icon
-        }
+        # Criar resultado (ProbeResult também pode ser lido como dicionário)
+        result = ProbeResult(timestamp, name, host, ping_result, app_port_result, admin_port_result, http_result,
+                             status, dns_result)
         
         # Log no console
-        ping_info = f"{ping_result['response_time']}ms" if ping_result['success'] else ping_result.get('error', 'Failed')
-        app_info = f"{app_port_result['response_time']}ms" if app_port_result['success'] else app_port_result.get('status', 'Failed')
-        admin_info = f"{admin_port_result['response_time']}ms" if admin_port_result['success'] else admin_port_result.get('status', 'Failed')
+        ping_info = f"{ping_result.response_time}ms" if ping_result.success else (ping_result.error or 'Failed')
+        app_info = f"{app_port_result.response_time}ms" if app_port_result.success else (app_port_result.status or 'Failed')
+        admin_info = f"{admin_port_result.response_time}ms" if admin_port_result.success else (admin_port_result.status or 'Failed')
         
         http_info = ''
         if http_result:
-            if http_result['success']:
-                http_info = f" | HTTP: {http_result['status_code']} ({http_result['response_time']:.2f}s)"
+            if http_result.success:
+                http_info = f" | HTTP: {http_result.status_code} ({http_result.response_time:.2f}s)"
             else:
-                error_msg = http_result.get('error', f"Status {http_result['status_code']}")
+                error_msg = http_result.error or f"Status {http_result.status_code}"
                 http_info = f" | HTTP: {error_msg}"
         
         log_message = f"{status_icon} {name} ({host}) - Ping: {ping_info} | App: {app_info} | Admin: {admin_info}{http_info}"
@@ -274,81 +519,232 @@ class ServerMonitor:
         # Salvar no CSV
         self.save_to_csv(result)
         
-        # Verificar se precisa de alerta
+        # Verificar se precisa de alerta (confirmação, oscilação e supressão em AlertStateMachine)
         previous_status = self.server_status.get(name, {}).get('status')
-        if previous_status and previous_status not in ['OFFLINE', 'PORTAS_FECHADAS', 'ERRO_HTTP'] and status in ['OFFLINE', 'PORTAS_FECHADAS', 'ERRO_HTTP']:
-            # Servidor ficou indisponível
-            self.play_alert_sound()
-            alert_message = f"ALERTA: Servidor {name} ({host}) ficou indisponível!\nStatus: {status}"
-            self.send_email_alert(f"Servidor {name} Indisponível", alert_message)
-        elif previous_status in ['OFFLINE', 'PORTAS_FECHADAS', 'ERRO_HTTP'] and status == 'ONLINE':
-            # Servidor voltou a funcionar
-            recovery_message = f"RECUPERAÇÃO: Servidor {name} ({host}) voltou a funcionar!\nStatus: {status}"
-            self.send_email_alert(f"Servidor {name} Recuperado", recovery_message)
+        for event in self.alert_state.observe(name, status, previous_status=previous_status):
+            if event == 'DOWN':
+                # Servidor ficou indisponível
+                self.play_alert_sound()
+                alert_message = f"ALERTA: Servidor {name} ({host}) ficou indisponível!\nStatus: {status}"
+                self.send_email_alert(f"Servidor {name} Indisponível", alert_message)
+            elif event == 'UP':
+                # Servidor voltou a funcionar
+                recovery_message = f"RECUPERAÇÃO: Servidor {name} ({host}) voltou a funcionar!\nStatus: {status}"
+                self.send_email_alert(f"Servidor {name} Recuperado", recovery_message)
+            elif event == 'FLAPPING':
+                flapping_message = (f"ALERTA: Servidor {name} ({host}) está oscilando entre disponível e "
+                                    f"indisponível; alertas suspensos até estabilizar.\nStatus: {status}")
+                self.send_email_alert(f"Servidor {name} Instável", flapping_message)
+            elif event == 'STABLE':
+                stable_message = f"Servidor {name} ({host}) estabilizou.\nStatus: {status}"
+                self.send_email_alert(f"Servidor {name} Estável", stable_message)
         
-        self.server_status[name] = result
+        self.status_board.publish(result)
+        self.stats.record_result(result)
+        self.publish_result(result)
         return result
     
+    def add_listener(self, callback):
+        """Registra uma função chamada (na thread da verificação) a cada resultado"""
+        with self._listeners_lock:
+            self._listeners = self._listeners + [callback]
+    
+    def remove_listener(self, callback):
+        """Remove uma função registrada com add_listener"""
+        with self._listeners_lock:
+            self._listeners = [listener for listener in self._listeners if listener != callback]
+    
+    def publish_result(self, result):
+        """Entrega o resultado a todos os ouvintes registrados"""
+        # A lista é substituída (não alterada) ao registrar: iterar sem lock é seguro
+        for listener in self._listeners:
+            try:
+                listener(result)
+            except Exception as e:
+                self.logger.error(f"Erro ao publicar resultado de {result['name']}: {e}")
+    
     def save_to_csv(self, result):
-        """Salva resultado no arquivo CSV"""
+        """Enfileira o resultado para gravação em lote no histórico"""
+        self.history.put(result)
+    
+    def create_probe_backend(self):
+        """Cria o backend de verificação escolhido em CONFIG['probe_backend']"""
+        if CONFIG['probe_backend'] == 'async':
+            from async_probes import AsyncProbeBackend
+            return AsyncProbeBackend(self, CONFIG)
+        return ThreadedProbeBackend(self)
+    
+    def configure_scheduler(self):
+        """Aplica ao agendador os parâmetros atuais de CONFIG"""
+        self.scheduler.default_interval = CONFIG['monitor_interval']
+        self.scheduler.jitter = CONFIG['schedule_jitter']
+        self.scheduler.recheck_interval = CONFIG['state_change_recheck']
+        self.scheduler.backoff_after = CONFIG['down_backoff_after']
+        self.scheduler.max_backoff_interval = CONFIG['max_backoff_interval']
+    
+    def set_servers(self, servers):
+        """Troca a lista de servidores monitorados sem reiniciar o monitoramento"""
+        self.servers = servers
+        self._scheduled_servers = servers
+        self.scheduler.set_servers(servers)
+        self.alert_state.retain(server['name'] for server in servers)
+        self.status_board.retain(server['name'] for server in servers)
+        self.dns.retain(server['host'] for server in servers)
+        self._wakeup.set()
+    
+    def check_servers_config(self):
+        """Aplica as mudanças de servers_config_file: só os servidores incluídos, removidos e alterados
+
+        Retorna a diferença aplicada (None se o arquivo não mudou).
+        """
+        servers = self.config_watcher.poll()
+        if servers is None:
+            return None
+        diff = diff_servers(self.servers, servers)
+        if diff:
+            self.set_servers(servers)
+            self.logger.info(f"Lista de servidores recarregada de {CONFIG['servers_config_file']} ({diff.summary()})")
+        return diff
+    
+    def on_probe_done(self, server, future, started=None):
+        """Fim de uma verificação: agenda a próxima e acorda o loop"""
+        status = None
+        if future.cancelled():
+            self.scheduler.complete(server['name'], None)
+            return
+        failed = False
         try:
-            with open(CONFIG['csv_file'], 'a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                http_status = ''
-                if result['http']:
-                    if result['http']['success']:
-                        http_status = f"{result['http']['status_code']} ({result['http']['response_time']:.2f}s)"
-                    else:
-                        http_status = result['http'].get('error', f"Error {result['http']['status_code']}")
-                
-                writer.writerow([
-                    result['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                    result['name'],
-                    result['host'],
-                    result['ping'],
-                    result['app_port'],
-                    result['admin_port'],
-                    http_status,
-                    result['status']
-                ])
+            result = future.result()
+            status = result.status if result else None
         except Exception as e:
-            self.logger.error(f"Erro ao salvar CSV: {e}")
+            failed = True
+            self.logger.error(f"Erro ao monitorar {server['name']}: {e}")
+        if started is not None:
+            self.stats.record_probe(time.monotonic() - started, failed)
+        cycle_duration = self.scheduler.complete(server['name'], status)
+        if cycle_duration is not None:
+            self.stats.record_cycle(cycle_duration)
+            self.logger.debug(f"Ciclo de verificação concluído em {cycle_duration:.2f}s")
+        self._wakeup.set()
+    
+    def get_diagnostics(self):
+        """Instrumentação do motor de verificação: ciclos, atraso, fila e latência por tipo"""
+        diagnostics = self.stats.snapshot()
+        diagnostics.update({
+            'servers': len(self.servers),
+            'in_flight': self.scheduler.in_flight(),
+            'next_check_in': self.scheduler.time_until_next(),
+            'history_queue': self.history.queue_size(),
+            'history_dropped': self.history.dropped,
+            'dns': self.dns.snapshot(),
+        })
+        return diagnostics
+    
+    def set_instrumentation_mode(self, mode):
+        """Troca o modo da instrumentação ('off', 'basic' ou 'full'), zerando as medidas"""
+        CONFIG['instrumentation'] = mode
+        self.stats = ProbeStats(mode)
     
     def monitor_loop(self):
-        """Loop principal de monitoramento"""
+        """Loop principal de monitoramento: despacha cada servidor quando vence seu horário"""
         self.log_status("=== Iniciando monitoramento de servidores GlassFish ===")
         
-        while self.monitoring:
-            try:
-                for server in self.servers:
-                    if not self.monitoring:
-                        break
-                    self.monitor_server(server)
-                
-                if self.monitoring:
-                    time.sleep(CONFIG['monitor_interval'])
+        backend = self.create_probe_backend()
+        next_publish = 0
+        try:
+            while self.monitoring:
+                try:
+                    # Resultados que chegaram desde a última publicação viram uma única versão do status
+                    now = time.monotonic()
+                    if now >= next_publish:
+                        self.status_board.flush()
+                        next_publish = now + CONFIG['status_publish_interval']
+                    self.configure_scheduler()
+                    self.check_servers_config()
+                    if self.servers is not self._scheduled_servers:
+                        self.set_servers(self.servers)
                     
-            except KeyboardInterrupt:
-                self.log_status("Monitoramento interrompido pelo usuário")
-                break
-            except Exception as e:
-                self.logger.error(f"Erro no loop de monitoramento: {e}")
-                time.sleep(5)
+                    # Limitar as verificações em andamento (sem fila acumulada no backend)
+                    in_flight = self.scheduler.in_flight()
+                    free_slots = max(1, int(CONFIG['max_concurrent_probes'])) - in_flight
+                    if free_slots > 0:
+                        lags = []
+                        due = self.scheduler.pop_due(limit=free_slots, lags=lags)
+                        for server in due:
+                            started = time.monotonic()
+                            future = backend.submit(server)
+                            future.add_done_callback(
+                                lambda f, server=server, started=started: self.on_probe_done(server, f, started))
+                        if due:
+                            self.stats.record_dispatch(lags, in_flight + len(due), CONFIG['monitor_interval'])
+                    
+                    # Dormir até a próxima verificação, uma conclusão ou a parada
+                    wait = self.scheduler.time_until_next()
+                    self._wakeup.wait(1.0 if wait is None else min(wait, 1.0))
+                    self._wakeup.clear()
+                    
+                except KeyboardInterrupt:
+                    self.log_status("Monitoramento interrompido pelo usuário")
+                    break
+                except Exception as e:
+                    self.logger.error(f"Erro no loop de monitoramento: {e}")
+                    time.sleep(5)
+        finally:
+            backend.close()
+            # Pool das verificações só é liberado depois que as verificações em andamento terminaram
+            # (e mantido se o monitoramento já foi reiniciado enquanto este loop encerrava)
+            if not self.monitoring and self._check_executor is not None:
+                self._check_executor.shutdown(wait=False, cancel_futures=True)
+                self._check_executor = None
+            self.status_board.flush()
         
         self.log_status("=== Monitoramento finalizado ===")
     
+    def start_status_api(self):
+        """Inicia a API HTTP de status, se habilitada em CONFIG['status_api']"""
+        if not CONFIG['status_api'] or self.status_api is not None:
+            return
+        from status_api import StatusApi
+        try:
+            self.status_api = StatusApi(self, CONFIG['status_api_host'], CONFIG['status_api_port'],
+                                        CONFIG['status_api_refresh'])
+            self.status_api.start()
+        except Exception as e:
+            self.status_api = None
+            self.logger.error(f"Erro ao iniciar API de status: {e}")
+    
+    def stop_status_api(self):
+        """Para a API HTTP de status"""
+        if self.status_api is not None:
+            self.status_api.stop()
+            self.status_api = None
+    
     def start_monitoring(self):
         """Inicia o monitoramento em thread separada"""
+        self.start_status_api()
+        self.alerts.start()
+        self.history.start()
         if not self.monitoring:
             self.monitoring = True
             self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
             self.monitor_thread.start()
     
-    def stop_monitoring(self):
-        """Para o monitoramento"""
+    def stop_monitoring(self, wait=True):
+        """Para o monitoramento
+
+        Com wait=False (interface) não espera o fim do loop e das verificações
+        em andamento, nem o envio de alertas e a gravação do histórico
+        pendentes: tudo termina em segundo plano.
+        """
         self.monitoring = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
+        self._wakeup.set()
+        if wait and self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=5)
+        self.http_pool.close_all()
+        self.stop_status_api()
+        self.alerts.stop(timeout=CONFIG['alert_shutdown_timeout'] if wait else 0)
+        self.dns.stop()
+        self.history.stop(timeout=10 if wait else 0)
 
 if __name__ == '__main__':
     # Executar apenas o monitorador em modo console
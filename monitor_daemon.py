@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Daemon sem interface do Monitorador de Servidores GlassFish
+Divide servers_config.json entre vários processos de verificação e junta os
+resultados em uma única tabela de status e um único histórico
+"""
+
+import argparse
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import zlib
+
+from monitor import CONFIG, SERVERS, ServerMonitor
+from server_config import read_servers
+
+
+def load_servers(path, watcher=None):
+    """Lê a lista de servidores do arquivo JSON (servidores padrão se ausente ou vazio)
+
+    Com `watcher`, o arquivo passa a ser observado quando a lista veio dele.
+    """
+    try:
+        servers = read_servers(path)
+    except FileNotFoundError:
+        return SERVERS.copy()
+    if not servers:
+        return SERVERS.copy()
+    if watcher is not None:
+        watcher.seed()
+    return servers
+
+
+def shard_servers(servers, workers):
+    """Divide os servidores em `workers` partes; cada nome cai sempre na mesma parte"""
+    shards = [[] for _ in range(workers)]
+    for server in servers:
+        shards[zlib.crc32(server['name'].encode('utf-8')) % workers].append(server)
+    return shards
+
+
+def worker_main(index, servers, config, result_queue, stop_event, initial_status, server_updates):
+    """Processo de verificação: um ServerMonitor com a sua parte dos servidores
+
+    Listas novas recebidas em `server_updates` (recarga de servers_config.json)
+    são aplicadas ao agendador sem reiniciar o monitoramento.
+    """
+
+    # Ctrl+C é tratado pelo processo principal, que pede a parada pelo stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    CONFIG.update(config)
+    CONFIG['history_backends'] = []  # Histórico gravado apenas pelo processo principal
+    CONFIG['status_api'] = False  # API de status servida apenas pelo processo principal
+    CONFIG['config_reload_interval'] = 0  # Arquivo observado pelo processo principal, que repassa a parte de cada worker
+
+    monitor = ServerMonitor()
+    # Alertas vão ao processo principal, que envia um só resumo para todos os workers
+    monitor.alerts.forward = lambda subject, message: result_queue.put(('alert', subject, message))
+    # Status anterior preserva os alertas de transição após um reinício do worker
+    monitor.status_board.update(initial_status.values())
+    monitor.servers = servers
+    monitor.add_listener(result_queue.put)
+    monitor.start_monitoring()
+    try:
+        while not stop_event.wait(1):
+            if not monitor.monitor_thread.is_alive():
+                monitor.logger.error(f"Worker {index}: loop de monitoramento encerrado")
+                raise SystemExit(1)
+            # Aplicar só a lista mais recente, se chegaram várias
+            servers = None
+            while True:
+                try:
+                    servers = server_updates.get_nowait()
+                except queue.Empty:
+                    break
+            if servers is not None:
+                monitor.set_servers(servers)
+    finally:
+        monitor.stop_monitoring()
+
+
+class MonitorDaemon:
+    """Processo principal: inicia e reinicia os workers e consolida os resultados
+
+    self.monitor é um ServerMonitor que não verifica nada: guarda a tabela de
+    status consolidada, grava o histórico e repassa os resultados aos
+    ouvintes (add_listener), como no modo de processo único.
+    """
+
+    def __init__(self, servers=None, workers=None):
+        self.monitor = ServerMonitor()
+        self.logger = self.monitor.logger
+        if servers is None:
+            # Lista lida de servers_config_file, que passa a ser observado
+            servers = load_servers(CONFIG['servers_config_file'], self.monitor.config_watcher)
+        self.monitor.servers = servers
+        workers = workers or CONFIG['daemon_workers']
+        self.workers = max(1, min(int(workers), len(servers) or 1))
+        self.shards = shard_servers(servers, self.workers)
+        self.processes = [None] * self.workers
+        self.stop_events = [None] * self.workers
+        self.collectors = [None] * self.workers
+        self.server_updates = [None] * self.workers
+        self.restart_at = [None] * self.workers
+        self.stopping = False
+
+    def start_worker(self, index):
+        """Inicia (ou reinicia) o processo de uma parte dos servidores"""
+        shard = self.shards[index]
+        initial_status = {server['name']: self.monitor.server_status[server['name']]
+                          for server in shard if server['name'] in self.monitor.server_status}
+        # Fila e evento próprios: um worker morto no meio de uma escrita ou de uma
+        # espera deixa travados apenas os seus, que são substituídos no reinício
+        result_queue = multiprocessing.Queue()
+        stop_event = multiprocessing.Event()
+        server_updates = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(index, shard, dict(CONFIG), result_queue, stop_event, initial_status, server_updates),
+            name=f'monitor-worker-{index}',
+            daemon=True)
+        process.start()
+        collector = threading.Thread(target=self.collect_results, args=(index, result_queue, process),
+                                     name=f'collector-{index}', daemon=True)
+        collector.start()
+        self.processes[index] = process
+        self.stop_events[index] = stop_event
+        self.collectors[index] = collector
+        self.server_updates[index] = server_updates
+        self.restart_at[index] = None
+        self.logger.info(f"Worker {index} iniciado (PID {process.pid}, {len(shard)} servidores)")
+
+    def check_workers(self):
+        """Reinicia, após daemon_restart_delay, os workers que terminaram sozinhos"""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process is None or process.is_alive():
+                continue
+            if self.restart_at[index] is None:
+                delay = CONFIG['daemon_restart_delay']
+                self.logger.error(f"Worker {index} terminou inesperadamente (código {process.exitcode}); "
+                                  f"reiniciando em {delay}s")
+                self.restart_at[index] = now + delay
+            elif now >= self.restart_at[index]:
+                self.start_worker(index)
+
+    def check_servers_config(self):
+        """Recarga de servers_config.json: repassa a cada worker só a parte que mudou
+
+        A quantidade de workers não muda; cada servidor continua no worker
+        definido pelo nome. Workers parados ou aguardando reinício usam a
+        parte nova ao (re)iniciar.
+        """
+        if not self.monitor.check_servers_config():
+            return
+        for index, shard in enumerate(shard_servers(self.monitor.servers, self.workers)):
+            if shard == self.shards[index]:
+                continue
+            self.shards[index] = shard
+            process = self.processes[index]
+            if process is None:
+                if shard:
+                    self.start_worker(index)
+            elif process.is_alive():
+                self.server_updates[index].put(shard)
+
+    def collect_results(self, index, result_queue, process):
+        """Consolida os resultados de um worker: status, histórico e ouvintes
+
+        Termina quando o worker acabou e a sua fila está vazia.
+        """
+        while True:
+            try:
+                batch = [result_queue.get(timeout=1)]
+                # Tudo o que já está na fila entra numa única versão do status
+                while True:
+                    try:
+                        batch.append(result_queue.get_nowait())
+                    except queue.Empty:
+                        break
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+            except Exception as e:
+                self.logger.error(f"Erro ao ler resultados do worker {index}: {e}")
+                break
+            for result in batch:
+                if isinstance(result, tuple):  # ('alert', assunto, mensagem) repassado pelo worker
+                    self.monitor.alerts.put(*result[1:])
+                    continue
+                try:
+                    self.monitor.status_board.publish(result)
+                    self.monitor.save_to_csv(result)
+                    self.monitor.publish_result(result)
+                except Exception as e:
+                    self.logger.error(f"Erro ao consolidar resultado de {result.get('name')}: {e}")
+            self.monitor.status_board.flush()
+
+    def stop(self, *args):
+        """Pede a parada do daemon (também usado como tratador de sinal)"""
+        # Só marca; os workers são avisados fora do tratador de sinal, em shutdown
+        self.stopping = True
+
+    def run(self):
+        """Executa o daemon até receber SIGINT/SIGTERM"""
+        for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), self.stop)
+
+        self.logger.info(f"=== Daemon iniciado: {len(self.monitor.servers)} servidores em {self.workers} workers ===")
+        self.monitor.start_status_api()
+        for index in range(self.workers):
+            if self.shards[index]:
+                self.start_worker(index)
+
+        try:
+            while not self.stopping:
+                time.sleep(1)
+                self.check_workers()
+                self.check_servers_config()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Parada ordenada: workers, resultados pendentes e histórico"""
+        for index, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                self.stop_events[index].set()
+        deadline = time.monotonic() + CONFIG['daemon_shutdown_timeout']
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=max(0, deadline - time.monotonic()))
+        for index, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                self.logger.warning(f"Worker {index} não parou a tempo; encerrando à força")
+                process.terminate()
+                process.join()
+
+        # Com os workers parados, cada coletor esvazia a sua fila e termina
+        for collector in self.collectors:
+            if collector is not None:
+                collector.join()
+        self.monitor.stop_monitoring()
+        self.logger.info("=== Daemon finalizado ===")
+
+
+def main():
+    """Ponto de entrada do modo daemon"""
+    parser = argparse.ArgumentParser(description='Monitor de servidores GlassFish em múltiplos processos')
+    parser.add_argument('--workers', type=int, default=CONFIG['daemon_workers'],
+                        help='quantidade de processos de verificação')
+    parser.add_argument('--config', default=CONFIG['servers_config_file'],
+                        help='arquivo com a lista de servidores (recarregado quando muda)')
+    args = parser.parse_args()
+    CONFIG['servers_config_file'] = args.config
+
+    MonitorDaemon(workers=args.workers).run()
+
+
+if __name__ == '__main__':
+    main()
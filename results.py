@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registros de resultado do Monitorador de Servidores GlassFish
+Classes com __slots__ para as verificações e o resultado de cada servidor,
+que continuam acessíveis como dicionários somente leitura
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from enum import Enum
+
+
+class Status(str, Enum):
+    """Status geral de um servidor; compara igual à string (Status.ONLINE == 'ONLINE')"""
+
+    ONLINE = 'ONLINE'
+    ERRO_HTTP = 'ERRO_HTTP'
+    PORTAS_FECHADAS = 'PORTAS_FECHADAS'
+    OFFLINE = 'OFFLINE'
+
+    def __str__(self):
+        return self.value
+
+    @property
+    def icon(self):
+        return STATUS_ICONS[self]
+
+
+STATUS_ICONS = {
+    Status.ONLINE: '✅',
+    Status.ERRO_HTTP: '⚠️',
+    Status.PORTAS_FECHADAS: '⚠️',
+    Status.OFFLINE: '❌',
+}
+
+
+class Record(Mapping):
+    """Base dos registros: acesso por atributo e, para o código que espera dicionários, por chave
+
+    Campos com valor None não aparecem como chaves, como nos dicionários de antes.
+    """
+
+    __slots__ = ()
+    KEYS = ()  # Chaves na ordem dos dicionários antigos
+
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self.KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        return default
+
+    def __iter__(self):
+        return (key for key in self.KEYS if getattr(self, key) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Cópia em dicionários comuns (JSON, código antigo que altera o resultado)"""
+        return {key: value.to_dict() if isinstance(value, Record) else value for key, value in self.items()}
+
+    def __repr__(self):
+        # Mesmo texto dos dicionários antigos (usado no CSV do histórico)
+        return repr(self.to_dict())
+
+
+class CheckResult(Record):
+    """Resultado de uma verificação: ping, porta, HTTP ou DNS
+
+    response_time em ms (ping, portas, DNS) ou em segundos (HTTP), como antes.
+    """
+
+    KEYS = __slots__ = ('status_code', 'success', 'port', 'address', 'response_time', 'status', 'source',
+                        'lookup_time', 'error')
+
+    def __init__(self, success, response_time=None, error=None, port=None, status=None, status_code=None,
+                 address=None, source=None, lookup_time=None):
+        self.success = success
+        self.response_time = response_time
+        self.error = error
+        self.port = port
+        self.status = status  # Portas: 'ABERTA', 'FECHADA', 'ERRO' ou 'IGNORADO'
+        self.status_code = status_code
+        self.address = address
+        self.source = source
+        self.lookup_time = lookup_time
+
+
+class ProbeResult(Record):
+    """Resultado consolidado da verificação de um servidor
+
+    Todas as chaves antigas existem (inclusive com None); 'timestamp' e
+    'status_icon' são calculados a partir de checked_at (epoch) e do status.
+    """
+
+    __slots__ = ('checked_at', 'name', 'host', 'ping', 'app_port', 'admin_port', 'http', 'dns', 'status')
+    KEYS = ('timestamp', 'name', 'host', 'ping', 'app_port', 'admin_port', 'http', 'dns', 'status', 'status_icon')
+
+    def __init__(self, checked_at, name, host, ping, app_port, admin_port, http, status, dns=None):
+        self.checked_at = checked_at
+        self.name = name
+        self.host = host
+        self.ping = ping
+        self.app_port = app_port
+        self.admin_port = admin_port
+        self.http = http
+        self.dns = dns
+        self.status = status
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.checked_at)
+
+    @property
+    def status_icon(self):
+        return self.status.icon
+
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
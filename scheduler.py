@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador de verificações do Monitorador de Servidores GlassFish
+Fila de prioridade com o próximo horário de cada servidor
+"""
+
+import heapq
+import random
+import threading
+import time
+
+# Status considerados "fora do ar" para o recuo exponencial
+DOWN_STATUSES = ('OFFLINE', 'PORTAS_FECHADAS')
+
+
+class ScheduleEntry:
+    """Estado de agendamento de um servidor"""
+
+    __slots__ = ('server', 'due', 'seq', 'last_status', 'down_streak', 'in_flight')
+
+    def __init__(self, server, due):
+        self.server = server
+        self.due = due
+        self.seq = 0
+        self.last_status = None
+        self.down_streak = 0
+        self.in_flight = False
+
+
+class ProbeScheduler:
+    """Agenda cada servidor no seu próprio intervalo
+
+    - intervalo por servidor (chave 'interval' no cadastro) ou o padrão;
+    - variação aleatória (jitter) para evitar rajadas sincronizadas;
+    - nova verificação rápida logo após uma mudança de status;
+    - recuo exponencial para servidores fora do ar há várias verificações.
+
+    Um "ciclo" termina quando todos os servidores foram verificados ao
+    menos uma vez desde o início do ciclo anterior.
+    """
+
+    def __init__(self, default_interval=30, jitter=0.1, recheck_interval=5, backoff_after=3,
+                 max_backoff_interval=600):
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.recheck_interval = recheck_interval
+        self.backoff_after = backoff_after
+        self.max_backoff_interval = max_backoff_interval
+        self.last_cycle_duration = None
+        self._entries = {}
+        self._heap = []  # (horário, seq, nome); entradas com seq antigo são ignoradas
+        self._seq = 0
+        self._cycle_start = time.time()
+        self._cycle_pending = set()
+        self._in_flight = 0  # Entradas com in_flight, mantido em pop_due/complete
+        self._lock = threading.Lock()
+
+    def _jittered(self, interval):
+        if not self.jitter:
+            return interval
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _push(self, entry, due):
+        self._seq += 1
+        entry.due = due
+        entry.seq = self._seq
+        heapq.heappush(self._heap, (due, entry.seq, entry.server['name']))
+
+    def interval_for(self, server):
+        """Intervalo normal de verificação de um servidor"""
+        return float(server.get('interval') or self.default_interval)
+
+    def set_servers(self, servers, now=None):
+        """Aplica a lista de servidores: inclui novos, remove ausentes, atualiza cadastros"""
+        now = time.time() if now is None else now
+        with self._lock:
+            names = set()
+            for server in servers:
+                name = server['name']
+                if name in names:
+                    continue
+                names.add(name)
+                entry = self._entries.get(name)
+                if entry is None:
+                    # Servidores novos entram espalhados no início para não sair em rajada
+                    entry = self._entries[name] = ScheduleEntry(server, now)
+                    spread = self.interval_for(server) * self.jitter
+                    self._push(entry, now + random.uniform(0, spread))
+                    self._cycle_pending.add(name)
+                elif entry.server != server:
+                    # Cadastro alterado (host, portas, intervalo...): verificar logo com os dados novos
+                    entry.server = server
+                    entry.down_streak = 0
+                    if not entry.in_flight:
+                        spread = self.interval_for(server) * self.jitter
+                        self._push(entry, min(entry.due, now + random.uniform(0, spread)))
+            for name in [name for name in self._entries if name not in names]:
+                if self._entries.pop(name).in_flight:
+                    self._in_flight -= 1
+                self._cycle_pending.discard(name)
+
+    def pop_due(self, now=None, limit=None, lags=None):
+        """Servidores com verificação vencida (no máximo `limit`), marcados como em andamento
+
+        Se `lags` for uma lista, recebe o atraso (s) de cada servidor em relação ao horário agendado.
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+                _, seq, name = heapq.heappop(self._heap)
+                entry = self._entries.get(name)
+                if entry is None or entry.seq != seq or entry.in_flight:
+                    continue
+                entry.in_flight = True
+                self._in_flight += 1
+                due.append(entry.server)
+                if lags is not None:
+                    lags.append(now - entry.due)
+        return due
+
+    def time_until_next(self, now=None):
+        """Segundos até a próxima verificação agendada (None se não houver)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._heap:
+                _, seq, name = self._heap[0]
+                entry = self._entries.get(name)
+                if entry is None or entry.seq != seq or entry.in_flight:
+                    heapq.heappop(self._heap)  # Entrada obsoleta
+                    continue
+                return max(0.0, self._heap[0][0] - now)
+        return None
+
+    def in_flight(self):
+        """Quantidade de verificações em andamento"""
+        return self._in_flight
+
+    def complete(self, name, status, now=None):
+        """Registra o fim de uma verificação e agenda a próxima
+
+        Retorna a duração do ciclo quando esta verificação fecha um ciclo.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None  # Servidor removido durante a verificação
+            if entry.in_flight:
+                entry.in_flight = False
+                self._in_flight -= 1
+            interval = self.interval_for(entry.server)
+
+            if status in DOWN_STATUSES:
+                entry.down_streak += 1
+                if entry.down_streak > self.backoff_after:
+                    # Expoente limitado: down_streak cresce sem fim num servidor fora do ar há semanas
+                    factor = 2 ** min(entry.down_streak - self.backoff_after, 32)
+                    interval = min(interval * factor, max(interval, self.max_backoff_interval))
+            else:
+                entry.down_streak = 0
+
+            if status is not None and entry.last_status is not None and status != entry.last_status:
+                # Confirmar logo a mudança de status
+                interval = min(interval, self.recheck_interval)
+                entry.down_streak = 1 if status in DOWN_STATUSES else 0
+            if status is not None:
+                entry.last_status = status
+
+            self._push(entry, now + self._jittered(interval))
+
+            self._cycle_pending.discard(name)
+            if not self._cycle_pending:
+                self.last_cycle_duration = now - self._cycle_start
+                self._cycle_start = now
+                self._cycle_pending = set(self._entries)
+                return self.last_cycle_duration
+        return None
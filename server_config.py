@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lista de servidores do Monitorador de Servidores GlassFish
+Leitura e validação de servers_config.json e recarga quando o arquivo muda
+"""
+
+import json
+import os
+import time
+
+# Campos obrigatórios de cada servidor
+REQUIRED_KEYS = ('name', 'host', 'app_port', 'admin_port')
+
+
+def validate_servers(servers):
+    """Confere o formato da lista de servidores; ValueError com o primeiro problema encontrado"""
+    if not isinstance(servers, list):
+        raise ValueError("o arquivo deve conter uma lista de servidores")
+    for position, server in enumerate(servers, 1):
+        if not isinstance(server, dict):
+            raise ValueError(f"servidor {position}: esperado um objeto")
+        missing = [key for key in REQUIRED_KEYS if key not in server]
+        if missing:
+            raise ValueError(f"servidor {position}: faltam os campos {', '.join(missing)}")
+
+
+def read_servers(path):
+    """Lê e valida a lista de servidores de um arquivo JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        servers = json.load(f)
+    validate_servers(servers)
+    return servers
+
+
+def servers_by_name(servers):
+    """Servidores por nome (nomes repetidos: vale o primeiro, como no agendador)"""
+    by_name = {}
+    for server in servers:
+        by_name.setdefault(server['name'], server)
+    return by_name
+
+
+class ServerDiff:
+    """Diferença entre duas listas de servidores, por nome"""
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = added  # Nomes novos
+        self.removed = removed  # Nomes que saíram
+        self.changed = changed  # Mesmo nome, cadastro diferente (host, portas, URL, intervalo...)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self):
+        return f"incluídos: {len(self.added)}, removidos: {len(self.removed)}, alterados: {len(self.changed)}"
+
+
+def diff_servers(old, new):
+    """Servidores incluídos, removidos e alterados de `old` para `new`"""
+    old_by_name = servers_by_name(old)
+    new_by_name = servers_by_name(new)
+    return ServerDiff(
+        added=[name for name in new_by_name if name not in old_by_name],
+        removed=[name for name in old_by_name if name not in new_by_name],
+        changed=[name for name, server in new_by_name.items()
+                 if name in old_by_name and old_by_name[name] != server])
+
+
+class ServerConfigWatcher:
+    """Observa `servers_config_file` e devolve a lista nova quando o arquivo muda
+
+    Só observa depois de `seed()`, chamado por quem carregou a lista desse
+    arquivo: listas passadas direto ao monitor (SERVERS no modo console,
+    `monitor.servers = ...`) nunca são trocadas pelo conteúdo do arquivo.
+
+    A cada `config_reload_interval` segundos compara data de modificação e
+    tamanho do arquivo (um os.stat, sem reler o conteúdo). Arquivo inválido
+    ou lista vazia são ignorados com um aviso no log: a lista em uso
+    continua valendo até o próximo salvamento válido. Lê CONFIG a cada
+    chamada: mudanças de arquivo ou intervalo valem na hora.
+    """
+
+    def __init__(self, config, logger=None):
+        self.config = config
+        self.logger = logger
+        self._path = None
+        self._signature = None
+        self._next_check = 0
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def seed(self):
+        """Passa a observar servers_config_file, cujo conteúdo atual é a lista em uso"""
+        self._path = self.config['servers_config_file']
+        self._signature = self._stat(self._path)
+
+    def poll(self, now=None):
+        """Lista de servidores lida do arquivo se ele mudou desde a última leitura; None caso contrário"""
+        interval = self.config['config_reload_interval']
+        now = time.monotonic() if now is None else now
+        if not interval or self._path is None or now < self._next_check:
+            return None
+        self._next_check = now + interval
+
+        path = self.config['servers_config_file']
+        if path != self._path:
+            self._path = path
+            self._signature = None
+        signature = self._stat(path)
+        if signature is None:
+            return None  # Arquivo ausente: manter a lista atual
+        if signature == self._signature:
+            return None
+        self._signature = signature
+
+        try:
+            servers = read_servers(path)
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.error(f"Erro ao recarregar {path} (lista atual mantida): {e}")
+            return None
+        if not servers:
+            if self.logger:
+                self.logger.warning(f"{path} sem servidores; lista atual mantida")
+            return None
+        return servers
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice da lista de servidores do Monitorador de Servidores GlassFish
+Filtro e ordenação da tabela da interface em memória, sem percorrer o Treeview
+"""
+
+# Filtros de status
+STATUS_FILTERS = ('todos', 'problemas')  # 'problemas' = verificados e fora de ONLINE
+
+# Ordenações da lista
+SORT_KEYS = ('cadastro', 'latencia_desc', 'latencia_asc', 'nome')
+
+
+def is_problem(status):
+    """Status que entra no filtro 'problemas' (servidores ainda não verificados ficam de fora)"""
+    return status is not None and status != 'ONLINE'
+
+
+def result_latency(result):
+    """Latência (ms) usada na ordenação: HTTP quando houve resposta, senão ping; None sem medida"""
+    if result is None:
+        return None
+    http = result.http
+    if http is not None and http.status_code is not None and http.response_time is not None:
+        return http.response_time * 1000
+    if result.ping.success:
+        return result.ping.response_time
+    return None
+
+
+class ServerEntry:
+    """Servidor no índice: dados usados pelo filtro e pela ordenação"""
+
+    __slots__ = ('server', 'position', 'name_key', 'host_key', 'status', 'latency')
+
+    def __init__(self, server, position):
+        self.server = server
+        self.position = position  # Posição na lista de cadastro
+        self.name_key = server['name'].lower()
+        self.host_key = str(server['host']).lower()
+        self.status = None  # None = ainda não verificado
+        self.latency = None
+
+
+class ServerIndex:
+    """Lista filtrada e ordenada dos servidores, mantida em memória
+
+    A interface só desenha as linhas visíveis de `view()`. Resultados novos
+    atualizam as entradas em O(1) cada; a lista só é refeita (uma vez, na
+    próxima leitura) quando a mudança afeta o filtro ou a ordenação atuais.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._view = []
+        self._dirty = True
+        self.status_filter = 'todos'
+        self.host_prefix = ''
+        self.sort_key = 'cadastro'
+
+    def set_servers(self, servers, results=None):
+        """Recria o índice a partir da lista de servidores (nomes repetidos: vale o primeiro)"""
+        entries = {}
+        for server in servers:
+            if server['name'] not in entries:
+                entries[server['name']] = ServerEntry(server, len(entries))
+        self._entries = entries
+        self._dirty = True
+        if results is not None:
+            self.update(results)
+
+    def update(self, results, names=None):
+        """Aplica os resultados de `names` (todos se None); True se a lista exibida mudou"""
+        entries = self._entries
+        if names is None:
+            names = entries
+        by_status = self.status_filter != 'todos'
+        by_latency = self.sort_key.startswith('latencia')
+        for name in names:
+            entry = entries.get(name)
+            if entry is None:
+                continue
+            result = results.get(name)
+            status = None if result is None else str(result.status)
+            latency = result_latency(result)
+            if by_status and is_problem(entry.status) != is_problem(status):
+                self._dirty = True
+            if by_latency and entry.latency != latency:
+                self._dirty = True
+            entry.status = status
+            entry.latency = latency
+        return self._dirty
+
+    def set_filter(self, status_filter=None, host_prefix=None):
+        """Muda o filtro de status e/ou o prefixo do host"""
+        if status_filter is not None:
+            if status_filter not in STATUS_FILTERS:
+                raise ValueError(f"Filtro de status desconhecido: {status_filter}")
+            self.status_filter = status_filter
+        if host_prefix is not None:
+            self.host_prefix = host_prefix.strip().lower()
+        self._dirty = True
+
+    def set_sort(self, sort_key):
+        """Muda a ordenação da lista"""
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"Ordenação desconhecida: {sort_key}")
+        self.sort_key = sort_key
+        self._dirty = True
+
+    def _matches(self, entry):
+        if self.status_filter == 'problemas' and not is_problem(entry.status):
+            return False
+        return not self.host_prefix or entry.host_key.startswith(self.host_prefix)
+
+    def view(self):
+        """Nomes exibidos, na ordem atual (refeita só quando necessário)"""
+        if self._dirty:
+            entries = [entry for entry in self._entries.values() if self._matches(entry)]
+            if self.sort_key == 'nome':
+                entries.sort(key=lambda entry: entry.name_key)
+            elif self.sort_key == 'latencia_desc':
+                # Sem medida por último; empates na ordem do cadastro
+                entries.sort(key=lambda entry: (entry.latency is None, -(entry.latency or 0), entry.position))
+            elif self.sort_key == 'latencia_asc':
+                entries.sort(key=lambda entry: (entry.latency is None, entry.latency or 0, entry.position))
+            self._view = [entry.server['name'] for entry in entries]
+            self._dirty = False
+        return self._view
+
+    def server(self, name):
+        """Configuração do servidor `name`"""
+        return self._entries[name].server
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
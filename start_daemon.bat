@@ -0,0 +1,13 @@
+@echo off
+echo ========================================
+echo    Monitor de Servidores GlassFish
+echo         (Modo Daemon)
+echo ========================================
+echo.
+echo Iniciando monitoramento em varios processos...
+echo Pressione Ctrl+C para parar
+echo.
+python monitor_daemon.py
+echo.
+echo Monitor finalizado.
+pause
\ No newline at end of file
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API HTTP de status do Monitorador de Servidores GlassFish
+JSON com o status atual (/status) e métricas em formato texto do Prometheus (/metrics)
+"""
+
+import bisect
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from history import STATUS_CODES
+from results import Record
+
+# Limites (s) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Verificações de um resultado e o fator para converter response_time em segundos
+CHECKS = (('dns', 0.001), ('ping', 0.001), ('app_port', 0.001), ('admin_port', 0.001), ('http', 1.0))
+
+
+class LatencyHistogram:
+    """Histograma cumulativo de latências no formato do Prometheus"""
+
+    __slots__ = ('counts', 'total', 'count', 'failures')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Último = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.failures = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def label_value(value):
+    """Escapa um valor de label do formato texto do Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def json_default(value):
+    """Serializa registros de resultado, datetime (e o que mais aparecer) nos resultados"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class StatusApi:
+    """Servidor HTTP embutido com o status e as métricas do monitor
+
+    O registro de resultados (add_listener) só atualiza contadores. O JSON e
+    a página de métricas são serializados por uma thread própria, quando um
+    ciclo de verificação termina ou, com resultados novos, no máximo a cada
+    `refresh_interval` segundos; as requisições apenas devolvem esses bytes.
+    """
+
+    def __init__(self, monitor, host='127.0.0.1', port=8765, refresh_interval=1.0):
+        self.monitor = monitor
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.snapshot = (b'{}', b'')  # (JSON de /status, texto de /metrics)
+        self.sweep_duration = None
+        self._histograms = {}
+        self._cycle_start = time.time()
+        self._cycle_pending = set()
+        self._cycle_servers = None
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._cycle_closed = threading.Event()
+        self._running = False
+        self._server = None
+        self._threads = []
+
+    def record_result(self, result):
+        """Ouvinte do monitor: atualiza histogramas e o fim de ciclo (barato)"""
+        name = result['name']
+        now = time.time()
+        with self._lock:
+            for check, scale in CHECKS:
+                check_result = result.get(check)
+                if not check_result or check_result.get('status') == 'IGNORADO':
+                    continue
+                histogram = self._histograms.get((name, check))
+                if histogram is None:
+                    histogram = self._histograms[(name, check)] = LatencyHistogram()
+                if check_result.get('success'):
+                    histogram.observe(check_result.get('response_time', 0) * scale)
+                else:
+                    histogram.failures += 1
+
+            # Ciclo: todos os servidores monitorados responderam ao menos uma vez
+            servers = self.monitor.servers
+            if servers is not self._cycle_servers:
+                # Lista trocada: servidores removidos não seguram o ciclo aberto
+                self._cycle_servers = servers
+                self._cycle_pending &= {server['name'] for server in servers}
+            self._cycle_pending.discard(name)
+            if not self._cycle_pending:
+                self.sweep_duration = now - self._cycle_start
+                self._cycle_start = now
+                self._cycle_pending = {server['name'] for server in servers}
+                self._cycle_closed.set()
+        self._dirty.set()
+
+    def build_snapshot(self):
+        """Serializa o status atual e as métricas (fora do caminho das verificações)"""
+        status = self.monitor.server_status  # Snapshot imutável: consistente sem copiar
+        names = {server['name'] for server in self.monitor.servers}
+        results = [status[name] for name in sorted(status) if name in names]
+        with self._lock:
+            histograms = {key: (list(h.counts), h.total, h.count, h.failures)
+                          for key, h in self._histograms.items() if key[0] in names}
+            sweep_duration = self.sweep_duration
+        generated_at = time.time()
+
+        body = {
+            'generated_at': datetime.fromtimestamp(generated_at).isoformat(),
+            'version': status.version,
+            'sweep_duration': sweep_duration,
+            'servers': results,
+        }
+        status_json = json.dumps(body, default=json_default, ensure_ascii=False).encode('utf-8')
+
+        lines = [
+            '# HELP glassfish_server_up Servidor totalmente funcional (1) ou não (0)',
+            '# TYPE glassfish_server_up gauge',
+        ]
+        for result in results:
+            labels = f'server="{label_value(result["name"])}",host="{label_value(result["host"])}"'
+            lines.append(f'glassfish_server_up{{{labels}}} {1 if result["status"] == "ONLINE" else 0}')
+        lines += [
+            '# HELP glassfish_server_status_code Status atual (0 ONLINE, 1 ERRO_HTTP, 2 PORTAS_FECHADAS, 3 OFFLINE)',
+            '# TYPE glassfish_server_status_code gauge',
+        ]
+        for result in results:
+            lines.append(f'glassfish_server_status_code{{server="{label_value(result["name"])}"}} '
+                         f'{STATUS_CODES.get(result["status"], -1)}')
+        lines += [
+            '# HELP glassfish_last_check_timestamp_seconds Horário (epoch) da última verificação',
+            '# TYPE glassfish_last_check_timestamp_seconds gauge',
+        ]
+        for result in results:
+            lines.append(f'glassfish_last_check_timestamp_seconds{{server="{label_value(result["name"])}"}} '
+                         f'{result["timestamp"].timestamp():.3f}')
+
+        lines += [
+            '# HELP glassfish_check_latency_seconds Latência das verificações bem-sucedidas',
+            '# TYPE glassfish_check_latency_seconds histogram',
+        ]
+        for (name, check), (counts, total, count, _) in sorted(histograms.items()):
+            labels = f'server="{label_value(name)}",check="{check}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'glassfish_check_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'glassfish_check_latency_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'glassfish_check_latency_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'glassfish_check_latency_seconds_count{{{labels}}} {count}')
+        lines += [
+            '# HELP glassfish_check_failures_total Verificações que falharam',
+            '# TYPE glassfish_check_failures_total counter',
+        ]
+        for (name, check), (_, _, _, failures) in sorted(histograms.items()):
+            lines.append(f'glassfish_check_failures_total{{server="{label_value(name)}",check="{check}"}} {failures}')
+
+        if sweep_duration is not None:
+            lines += [
+                '# HELP glassfish_sweep_duration_seconds Duração do último ciclo completo de verificação',
+                '# TYPE glassfish_sweep_duration_seconds gauge',
+                f'glassfish_sweep_duration_seconds {sweep_duration:.3f}',
+            ]
+        lines += [
+            '# HELP glassfish_snapshot_timestamp_seconds Horário (epoch) em que estes dados foram gerados',
+            '# TYPE glassfish_snapshot_timestamp_seconds gauge',
+            f'glassfish_snapshot_timestamp_seconds {generated_at:.3f}',
+        ]
+        metrics_text = ('\n'.join(lines) + '\n').encode('utf-8')
+
+        self.snapshot = (status_json, metrics_text)
+
+    def changes_json(self, since):
+        """JSON só com os servidores alterados depois da versão `since` (/status?since=N)"""
+        changes = self.monitor.status_board.changes_since(since)
+        body = {
+            'version': changes.version,
+            'since': since,
+            'full': changes.full,
+            'servers': [changes.snapshot[name] for name in sorted(changes.changed)],
+            'removed': sorted(changes.removed),
+        }
+        return json.dumps(body, default=json_default, ensure_ascii=False).encode('utf-8')
+
+    def _refresh_loop(self):
+        """Reserializa com dados novos: na hora ao fechar um ciclo, senão no máximo a cada refresh_interval"""
+        while self._running:
+            self._dirty.wait()
+            if not self._running:
+                break
+            self._dirty.clear()
+            self._cycle_closed.clear()
+            try:
+                self.build_snapshot()
+            except Exception as e:
+                self.monitor.logger.error(f"Erro ao gerar snapshot da API de status: {e}")
+            self._cycle_closed.wait(self.refresh_interval)
+
+    def start(self):
+        """Inicia o servidor HTTP e a thread de serialização"""
+        api = self
+
+        class Handler(StatusRequestHandler):
+            status_api = api
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._running = True
+        self._cycle_servers = self.monitor.servers
+        self._cycle_pending = {server['name'] for server in self._cycle_servers}
+        self.monitor.add_listener(self.record_result)
+        self.build_snapshot()
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name='status-api', daemon=True),
+            threading.Thread(target=self._refresh_loop, name='status-api-refresh', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.monitor.logger.info(f"API de status em http://{self.host}:{self.port}/status e /metrics")
+
+    def stop(self):
+        """Para o servidor HTTP"""
+        self._running = False
+        self._dirty.set()
+        self._cycle_closed.set()
+        self.monitor.remove_listener(self.record_result)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Atende /status e /metrics a partir do snapshot já serializado"""
+
+    status_api = None
+
+    def do_GET(self):
+        status_json, metrics_text = self.status_api.snapshot
+        path, _, query = self.path.partition('?')
+        path = path.rstrip('/')
+        since = parse_qs(query).get('since')
+        if path in ('', '/status') and since:
+            try:
+                since = int(since[0])
+            except ValueError:
+                self.send_error(400, 'since deve ser um número de versão')
+                return
+            self.send_body(self.status_api.changes_json(since), 'application/json; charset=utf-8')
+        elif path in ('', '/status'):
+            self.send_body(status_json, 'application/json; charset=utf-8')
+        elif path == '/metrics':
+            self.send_body(metrics_text, 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requisições não vão para o log do monitor
+        pass
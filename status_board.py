@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Quadro de status do Monitorador de Servidores GlassFish
+Snapshots imutáveis e versionados do último resultado de cada servidor
+"""
+
+import threading
+import time
+from collections.abc import Mapping
+
+
+class StatusSnapshot(Mapping):
+    """Último resultado de cada servidor numa versão; nunca é alterado depois de publicado
+
+    Funciona como um dicionário somente leitura (nome -> resultado). Os
+    resultados também não devem ser alterados por quem lê. Carrega também o
+    registro de mudanças até a sua versão, para changes_since ler sem lock.
+    """
+
+    __slots__ = ('version', 'created', '_results', '_log', '_horizon')
+
+    def __init__(self, version, results, log=(), horizon=0):
+        self.version = version
+        self.created = time.time()
+        self._results = results
+        self._log = log  # ((versão, nomes), ...) das últimas mudanças, tupla imutável
+        self._horizon = horizon  # Mudanças até esta versão podem ter saído do registro
+
+    def __getitem__(self, name):
+        return self._results[name]
+
+    def __iter__(self):
+        return iter(self._results)
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, name):
+        return name in self._results
+
+    def __repr__(self):
+        return f"StatusSnapshot(version={self.version}, servers={len(self._results)})"
+
+
+class StatusChanges:
+    """Resposta de changes_since: o que mudou entre a versão pedida e o snapshot atual"""
+
+    __slots__ = ('snapshot', 'changed', 'removed', 'full')
+
+    def __init__(self, snapshot, changed=(), removed=(), full=False):
+        self.snapshot = snapshot
+        self.changed = changed  # Servidores com resultado novo (presentes no snapshot)
+        self.removed = removed  # Servidores que saíram do quadro
+        self.full = full  # Versão antiga demais: `changed` traz todos os servidores
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+
+class StatusBoard:
+    """Publica o status dos servidores como snapshots imutáveis (copy-on-write)
+
+    publish() só enfileira o resultado; flush() aplica tudo o que chegou
+    numa única versão: o dicionário do snapshot é copiado uma vez por lote,
+    não a cada resultado. A referência `snapshot` é trocada de uma vez: quem
+    lê só pega `board.snapshot` (sem lock) e recebe uma visão consistente,
+    que não muda enquanto é percorrida. O registro das últimas mudanças
+    (até `log_size` servidores) vai junto no snapshot e responde "o que
+    mudou desde a versão N" sem lock e sem varrer todos os servidores.
+    """
+
+    def __init__(self, log_size=10000):
+        self.snapshot = StatusSnapshot(0, {})
+        self.log_size = log_size
+        self._log_count = 0  # Servidores somados nas entradas do registro
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def _commit(self, current, results, names):
+        """Troca o snapshot por uma nova versão com `names` no registro (chamado com o lock)"""
+        version = current.version + 1
+        log = current._log + ((version, names),)
+        self._log_count += len(names)
+        horizon = current._horizon
+        dropped = 0
+        while self._log_count > self.log_size and dropped < len(log):
+            horizon = log[dropped][0]
+            self._log_count -= len(log[dropped][1])
+            dropped += 1
+        self.snapshot = StatusSnapshot(version, results, log[dropped:], horizon)
+        return self.snapshot
+
+    def publish(self, result):
+        """Enfileira o resultado de um servidor; entra no snapshot no próximo flush()"""
+        with self._pending_lock:
+            self._pending.append(result)
+
+    def flush(self):
+        """Publica numa única versão os resultados enfileirados; retorna o snapshot atual"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        return self.update(pending)
+
+    def update(self, results):
+        """Publica vários resultados numa única versão"""
+        results = list(results)
+        with self._lock:
+            current = self.snapshot
+            if not results:
+                return current
+            merged = dict(current._results)
+            for result in results:
+                merged[result['name']] = result
+            return self._commit(current, merged, tuple({result['name']: None for result in results}))
+
+    def retain(self, names):
+        """Remove do quadro os servidores que não estão em `names`"""
+        names = set(names)
+        with self._lock:
+            current = self.snapshot
+            removed = tuple(name for name in current if name not in names)
+            if not removed:
+                return current
+            return self._commit(current, {name: result for name, result in current._results.items()
+                                          if name in names}, removed)
+
+    def changes_since(self, version):
+        """Servidores alterados ou removidos depois de `version`
+
+        Sem lock: lê só o snapshot atual e o registro que vem nele. Custo
+        proporcional ao número de mudanças. Se `version` é mais antiga que o
+        registro guardado, a resposta vem com full=True e todos os
+        servidores do snapshot atual.
+        """
+        snapshot = self.snapshot
+        if version >= snapshot.version:
+            return StatusChanges(snapshot)
+        if version < snapshot._horizon:
+            return StatusChanges(snapshot, tuple(snapshot), (), True)
+        names = set()
+        for entry_version, entry_names in reversed(snapshot._log):
+            if entry_version <= version:
+                break
+            names.update(entry_names)
+        changed = tuple(name for name in names if name in snapshot)
+        removed = tuple(name for name in names if name not in snapshot)
+        return StatusChanges(snapshot, changed, removed)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telemetria em memória do Monitorador de Servidores GlassFish
+Buffers circulares NumPy por servidor, alimentados direto pelos resultados
+"""
+
+import threading
+
+import numpy as np
+
+# Colunas de cada amostra, na ordem em que ficam no buffer
+FIELDS = ('timestamps', 'ping_status', 'http_response_times', 'app_port_status',
+          'admin_port_status', 'overall_status')
+
+
+class TelemetryBuffer:
+    """Buffer circular de amostras de um servidor (uma matriz float64 pré-alocada)"""
+
+    __slots__ = ('samples', 'head', 'count', 'version')
+
+    def __init__(self, capacity):
+        self.samples = np.zeros((capacity, len(FIELDS)))
+        self.head = 0  # Posição da próxima gravação
+        self.count = 0
+        self.version = 0
+
+    def append(self, row):
+        self.samples[self.head] = row
+        self.head = (self.head + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.version += 1
+
+    def ordered(self):
+        """Cópia das amostras em ordem cronológica"""
+        if self.count < len(self.samples):
+            return self.samples[:self.count].copy()
+        return np.concatenate((self.samples[self.head:], self.samples[:self.head]))
+
+
+class TelemetryStore:
+    """Telemetria de todos os servidores, alimentada por ServerMonitor.add_listener
+
+    add_result roda nas threads de verificação; series/version são lidos
+    pela interface. Trocar o servidor exibido não exige nenhuma coleta.
+    """
+
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def add_result(self, result):
+        """Registra um resultado do monitor com o horário real da verificação"""
+        http_result = result.get('http')
+        http_time = 0
+        if http_result and 'response_time' in http_result:
+            http_time = http_result['response_time'] * 1000  # Converter para ms
+        online = 1 if result.get('status') == 'ONLINE' else 0
+
+        with self._lock:
+            buffer = self._buffers.get(result['name'])
+            if buffer is None:
+                buffer = self._buffers[result['name']] = TelemetryBuffer(self.capacity)
+            buffer.append((
+                result['timestamp'].timestamp(),
+                1 if result['ping'].get('success') else 0,
+                http_time,
+                1 if result['app_port'].get('success') else 0,
+                1 if result['admin_port'].get('success') else 0,
+                online,
+            ))
+
+    def version(self, name):
+        """Contador que muda a cada amostra nova do servidor (0 se não há dados)"""
+        buffer = self._buffers.get(name)
+        return buffer.version if buffer else 0
+
+    def series(self, name):
+        """Séries do servidor em ordem cronológica: {campo: array}; timestamps em epoch (s)
+
+        Inclui 'uptime_percentage': disponibilidade acumulada dentro da janela
+        exibida (as últimas `capacity` amostras), como no gráfico original.
+        """
+        with self._lock:
+            buffer = self._buffers.get(name)
+            if buffer is None:
+                return None
+            samples = buffer.ordered()
+        series = {field: samples[:, index] for index, field in enumerate(FIELDS)}
+        overall = series['overall_status']
+        series['uptime_percentage'] = np.cumsum(overall) / np.arange(1, len(overall) + 1) * 100
+        return series
+
+    def retain(self, names):
+        """Descarta a telemetria de servidores que não estão mais em `names`"""
+        names = set(names)
+        with self._lock:
+            for name in [name for name in self._buffers if name not in names]:
+                del self._buffers[name]
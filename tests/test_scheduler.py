@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do agendador de verificações
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import ProbeScheduler
+
+
+class ProbeSchedulerBackoffTest(unittest.TestCase):
+    """Recuo exponencial de servidores fora do ar"""
+
+    def test_long_outage_keeps_server_scheduled(self):
+        """Milhares de verificações OFFLINE seguidas: intervalo no teto, servidor sempre na agenda"""
+        scheduler = ProbeScheduler(default_interval=30, jitter=0, backoff_after=3, max_backoff_interval=600)
+        scheduler.set_servers([{'name': 'srv', 'host': 'h', 'app_port': 8080, 'admin_port': 4848}], now=0)
+        now = 0
+        for _ in range(5000):
+            now += 1000
+            self.assertEqual(len(scheduler.pop_due(now=now)), 1)
+            scheduler.complete('srv', 'OFFLINE', now=now)
+            self.assertLessEqual(scheduler.time_until_next(now=now), 600)
+        self.assertEqual(scheduler.in_flight(), 0)
+        self.assertEqual(scheduler.time_until_next(now=now), 600)
+
+
+if __name__ == '__main__':
+    unittest.main()